@@ -1,160 +1,268 @@
-import pandas as pd
-from sklearn.feature_extraction.text import CountVectorizer
+import argparse
+import hashlib
+import html
+import importlib
+import inspect
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from importlib import metadata
+
+import matplotlib
+matplotlib.use('Agg')  # reports are rendered headless, e.g. from cron
 import matplotlib.pyplot as plt
-import seaborn as sns
-from wordcloud import WordCloud
 
-# Load the dataset
-file_path = 'websummit_startups_2024.csv'
-startups_data = pd.read_csv(file_path)
+from cube import load_cube
+from dataset import ROOT, dataset_version, load_startups
+from instrumentation import span
 
-# Display the first few rows of the dataset to understand its structure
-print(startups_data.head())
+# Batch report: every figure is an independent function of the dataset, rendered
+# in a process pool and written to disk together with an HTML index. A figure is
+# skipped when neither the dataset nor the code drawing it changed since the
+# last run, as recorded in the output directory's manifest.
 
-# Validate the data
-print(startups_data.describe(include='all'))
+DEFAULT_OUTPUT = os.path.join(ROOT, 'report')
+MANIFEST = 'manifest.json'
 
-# 1. Count the number of startups per category
-category_counts = startups_data['Category'].value_counts()
-plt.figure(figsize=(10, 6))
-sns.barplot(x=category_counts.values, y=category_counts.index, palette='viridis')
-plt.title('Number of Startups per Category')
-plt.xlabel('Number of Startups')
-plt.ylabel('Category')
 
-# 2. Count the number of startups per country
-country_counts = startups_data['Country'].value_counts()
-plt.figure(figsize=(10, 6))
-sns.barplot(x=country_counts.values, y=country_counts.index, palette='viridis')
-plt.title('Number of Startups per Country')
-plt.xlabel('Number of Startups')
-plt.ylabel('Country')
+def barplot(values, labels, title, xlabel, ylabel):
+    import seaborn as sns
 
-# 3. Analyze the pitches to find recurring themes or keywords
+    fig = plt.figure(figsize=(10, 6))
+    sns.barplot(x=values, y=labels, palette='viridis')
+    plt.title(title)
+    plt.xlabel(xlabel)
+    plt.ylabel(ylabel)
+    return fig
 
-# Remove NaN values in 'Pitch' column for text analysis
-clean_pitches = startups_data['Pitch'].dropna()
 
-# Use CountVectorizer to extract common words from pitches
-vectorizer = CountVectorizer(stop_words='english', max_features=20)
-word_counts = vectorizer.fit_transform(clean_pitches)
-common_words = pd.DataFrame({
-    'Word': vectorizer.get_feature_names_out(),
-    'Frequency': word_counts.toarray().sum(axis=0)
-}).sort_values(by='Frequency', ascending=False)
+def wordcloud_axes(startups_data, title, country=None):
+    import wordclouds
+    from keywords import load_term_index
 
-# Display the results
-print(common_words)
+    freqs = wordclouds.frequencies(load_term_index(startups_data), country=country)
+    plt.imshow(wordclouds.render(freqs), interpolation='bilinear')
+    plt.title(title)
+    plt.axis('off')
 
-# Plot the most common words in pitches
-plt.figure(figsize=(10, 6))
-sns.barplot(x=common_words['Frequency'], y=common_words['Word'], palette='viridis')
-plt.title('Most Common Words in Pitches')
-plt.xlabel('Frequency')
-plt.ylabel('Word')
 
-# 4. Focused analysis on Swiss startups
+# 1. Count the number of startups per category
+def category_counts(startups_data):
+    category_counts = load_cube(startups_data).marginal('Category')
+    return barplot(category_counts.values, category_counts.index, 'Number of Startups per Category', 'Number of Startups', 'Category')
 
-# Filter the dataset for startups based in Switzerland
-swiss_startups = startups_data[startups_data['Country'] == 'Switzerland']
-
-# Analyze the categories for Swiss startups
-swiss_categories = swiss_startups['Category'].value_counts()
-plt.figure(figsize=(10, 6))
-sns.barplot(x=swiss_categories.values, y=swiss_categories.index, palette='viridis')
-plt.title('Number of Swiss Startups per Category')
-plt.xlabel('Number of Startups')
-plt.ylabel('Category')
-
-# Extract and analyze pitches for common themes or keywords
-swiss_pitches = swiss_startups['Pitch'].dropna()
-swiss_word_counts = vectorizer.fit_transform(swiss_pitches)
-swiss_common_words = pd.DataFrame({
-    'Word': vectorizer.get_feature_names_out(),
-    'Frequency': swiss_word_counts.toarray().sum(axis=0)
-}).sort_values(by='Frequency', ascending=False)
-
-# Plot the most common words in Swiss pitches
-plt.figure(figsize=(10, 6))
-sns.barplot(x=swiss_common_words['Frequency'], y=swiss_common_words['Word'], palette='viridis')
-plt.title('Most Common Words in Swiss Pitches')
-plt.xlabel('Frequency')
-plt.ylabel('Word')
 
-# 5. Focused analysis on Portuguese startups
+# 2. Count the number of startups per country
+def country_counts(startups_data):
+    country_counts = load_cube(startups_data).marginal('Country')
+    return barplot(country_counts.values, country_counts.index, 'Number of Startups per Country', 'Number of Startups', 'Country')
 
-# Filter the dataset for startups based in Portugal
-portuguese_startups = startups_data[startups_data['Country'] == 'Portugal']
 
-# Extract and analyze pitches for common themes or keywords
-portuguese_pitches = portuguese_startups['Pitch'].dropna()
-portuguese_word_counts = vectorizer.fit_transform(portuguese_pitches)
-portuguese_common_words = pd.DataFrame({
-    'Word': vectorizer.get_feature_names_out(),
-    'Frequency': portuguese_word_counts.toarray().sum(axis=0)
-}).sort_values(by='Frequency', ascending=False)
+# 3. Analyze the pitches to find recurring themes or keywords
+def common_words(startups_data):
+    from keywords import load_term_index
 
-# Plot the most common words in Portuguese pitches
-plt.figure(figsize=(10, 6))
-sns.barplot(x=portuguese_common_words['Frequency'], y=portuguese_common_words['Word'], palette='viridis')
-plt.title('Most Common Words in Portuguese Pitches')
-plt.xlabel('Frequency')
-plt.ylabel('Word')
+    common_words = load_term_index(startups_data).top_words(20)
+    return barplot(common_words['Frequency'], common_words['Word'], 'Most Common Words in Pitches', 'Frequency', 'Word')
 
-# 6. Word cloud comparison between Swiss and Portuguese startups
 
-# Generate word clouds
-swiss_wordcloud = WordCloud(width=800, height=400, background_color='white').generate(' '.join(swiss_pitches))
-portuguese_wordcloud = WordCloud(width=800, height=400, background_color='white').generate(' '.join(portuguese_pitches))
+# 4. Focused analysis on Swiss startups
+def swiss_categories(startups_data):
+    swiss_categories = load_cube(startups_data).marginal('Category', Country='Switzerland')
+    return barplot(swiss_categories.values, swiss_categories.index, 'Number of Swiss Startups per Category', 'Number of Startups', 'Category')
+
 
-# Plot word clouds
-plt.figure(figsize=(16, 8))
+def swiss_common_words(startups_data):
+    from keywords import load_term_index
 
-plt.subplot(1, 2, 1)
-plt.imshow(swiss_wordcloud, interpolation='bilinear')
-plt.title('Word Cloud for Swiss Startups')
-plt.axis('off')
+    swiss_common_words = load_term_index(startups_data).top_words(20, country='Switzerland')
+    return barplot(swiss_common_words['Frequency'], swiss_common_words['Word'], 'Most Common Words in Swiss Pitches', 'Frequency', 'Word')
 
-plt.subplot(1, 2, 2)
-plt.imshow(portuguese_wordcloud, interpolation='bilinear')
-plt.title('Word Cloud for Portuguese Startups')
-plt.axis('off')
 
-# 7. Heatmap of startups by category and country
+# 5. Focused analysis on Portuguese startups
+def portuguese_common_words(startups_data):
+    from keywords import load_term_index
 
-# Create a pivot table
-category_country_pivot = startups_data.pivot_table(index='Category', columns='Country', aggfunc='size', fill_value=0)
+    portuguese_common_words = load_term_index(startups_data).top_words(20, country='Portugal')
+    return barplot(portuguese_common_words['Frequency'], portuguese_common_words['Word'], 'Most Common Words in Portuguese Pitches', 'Frequency', 'Word')
 
-# Plot heatmap
-plt.figure(figsize=(12, 8))
-sns.heatmap(category_country_pivot, cmap='viridis', annot=True, fmt='d')
-plt.title('Heatmap of Startups by Category and Country')
-plt.xlabel('Country')
-plt.ylabel('Category')
 
-# 8. Top categories in each country
+# 6. Word cloud comparison between Swiss and Portuguese startups
+def swiss_portuguese_wordclouds(startups_data):
+    fig = plt.figure(figsize=(16, 8))
+    plt.subplot(1, 2, 1)
+    wordcloud_axes(startups_data, 'Word Cloud for Swiss Startups', country='Switzerland')
+    plt.subplot(1, 2, 2)
+    wordcloud_axes(startups_data, 'Word Cloud for Portuguese Startups', country='Portugal')
+    return fig
 
-# Get top categories for each country
-top_categories_per_country = startups_data.groupby('Country')['Category'].apply(lambda x: x.value_counts().head(3))
 
-# Plot top categories for each country
-plt.figure(figsize=(12, 8))
-top_categories_per_country.unstack().plot(kind='bar', stacked=True, colormap='viridis')
-plt.title('Top Categories in Each Country')
-plt.xlabel('Country')
-plt.ylabel('Number of Startups')
-plt.legend(title='Category', bbox_to_anchor=(1.05, 1), loc='upper left')
+# 7. Heatmap of startups by category and country
+def category_country_heatmap(startups_data):
+    import seaborn as sns
 
-# 9. Word cloud for all startups
+    category_country_pivot = load_cube(startups_data).pivot('Category', 'Country')
+    fig = plt.figure(figsize=(12, 8))
+    sns.heatmap(category_country_pivot, cmap='viridis', annot=True, fmt='d')
+    plt.title('Heatmap of Startups by Category and Country')
+    plt.xlabel('Country')
+    plt.ylabel('Category')
+    return fig
 
-# Generate word cloud for all pitches
-all_wordcloud = WordCloud(width=800, height=400, background_color='white').generate(' '.join(clean_pitches))
 
-# Plot word cloud
-plt.figure(figsize=(10, 6))
-plt.imshow(all_wordcloud, interpolation='bilinear')
-plt.title('Word Cloud for All Startups')
-plt.axis('off')
+# 8. Top categories in each country
+def top_categories_per_country(startups_data):
+    top_categories_per_country = load_cube(startups_data).top_k('Category', by='Country', k=3)
+    fig, ax = plt.subplots(figsize=(12, 8))
+    top_categories_per_country.unstack().plot(kind='bar', stacked=True, colormap='viridis', ax=ax)
+    plt.title('Top Categories in Each Country')
+    plt.xlabel('Country')
+    plt.ylabel('Number of Startups')
+    plt.legend(title='Category', bbox_to_anchor=(1.05, 1), loc='upper left')
+    return fig
 
-# Show all plots
-plt.show()
\ No newline at end of file
+
+# 9. Word cloud for all startups
+def all_startups_wordcloud(startups_data):
+    fig = plt.figure(figsize=(10, 6))
+    wordcloud_axes(startups_data, 'Word Cloud for All Startups')
+    return fig
+
+
+FIGURES = {
+    'category_counts': category_counts,
+    'country_counts': country_counts,
+    'common_words': common_words,
+    'swiss_categories': swiss_categories,
+    'swiss_common_words': swiss_common_words,
+    'portuguese_common_words': portuguese_common_words,
+    'swiss_portuguese_wordclouds': swiss_portuguese_wordclouds,
+    'category_country_heatmap': category_country_heatmap,
+    'top_categories_per_country': top_categories_per_country,
+    'all_startups_wordcloud': all_startups_wordcloud,
+}
+
+
+# Code every figure may draw with besides its own function; a change to any of
+# it, or to the plotting libraries, re-renders the whole report
+HELPERS = [barplot, wordcloud_axes]
+MODULES = ['cube', 'keywords', 'wordclouds']
+LIBRARIES = ['matplotlib', 'seaborn', 'wordcloud']
+
+
+@lru_cache(maxsize=None)
+def code_stamp():
+    parts = [inspect.getsource(helper) for helper in HELPERS]
+    parts += [inspect.getsource(importlib.import_module(module)) for module in MODULES]
+    for library in LIBRARIES:
+        try:
+            parts.append(f'{library}=={metadata.version(library)}')
+        except metadata.PackageNotFoundError:
+            parts.append(f'{library} not installed')
+    return hashlib.sha256('\n'.join(parts).encode('utf-8')).hexdigest()
+
+
+def fingerprint(name, version, formats):
+    digest = hashlib.sha256()
+    for part in (name, version, ','.join(formats), inspect.getsource(FIGURES[name]), code_stamp()):
+        digest.update(part.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def render_figure(name, output_dir, formats):
+    # Runs in a worker process; the dataset comes from the shared on-disk cache
+    start = time.perf_counter()
+    with span(f'report.draw.{name}'):
+        fig = FIGURES[name](load_startups())
+    files = []
+    with span(f'report.save.{name}'):
+        for format in formats:
+            filename = f'{name}.{format}'
+            fig.savefig(os.path.join(output_dir, filename), format=format, bbox_inches='tight')
+            files.append(filename)
+    plt.close(fig)
+    return files, time.perf_counter() - start
+
+
+def write_index(output_dir, manifest):
+    items = []
+    for name in FIGURES:
+        entry = manifest.get(name)
+        if entry:
+            image = html.escape(entry['files'][0])
+            items.append(f'<figure><img src="{image}" alt="{name}"><figcaption>{html.escape(name)}</figcaption></figure>')
+    with open(os.path.join(output_dir, 'index.html'), 'w', encoding='utf-8') as f:
+        f.write('<!DOCTYPE html><html><head><meta charset="utf-8"><title>Web Summit Startups Report</title>'
+                '<style>img{max-width:100%}</style></head><body><h1>Web Summit Startups Report</h1>'
+                + ''.join(items) + '</body></html>\n')
+
+
+def build_report(output_dir=DEFAULT_OUTPUT, formats=('png',), workers=None, force=False, figures=None):
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, MANIFEST)
+    try:
+        with open(manifest_path, encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = {}
+
+    version = dataset_version()
+    pending = {}
+    for name in figures or FIGURES:
+        key = fingerprint(name, version, formats)
+        entry = manifest.get(name)
+        up_to_date = entry and entry['fingerprint'] == key and all(os.path.exists(os.path.join(output_dir, filename)) for filename in entry['files'])
+        if force or not up_to_date:
+            pending[name] = key
+
+    timings = {}
+    if pending:
+        from keywords import load_term_index
+
+        # Build the shared term index once so workers only load it; it is keyed
+        # by the frame, which the workers load identically
+        load_term_index(load_startups())
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {name: executor.submit(render_figure, name, output_dir, formats) for name in pending}
+        for name, future in futures.items():
+            files, timings[name] = future.result()
+            manifest[name] = {'fingerprint': pending[name], 'files': files}
+
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    write_index(output_dir, manifest)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Render the startup analysis report to image files and an HTML index.')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help='report directory')
+    parser.add_argument('--format', action='append', choices=['png', 'svg', 'pdf'], help='image format, repeatable (default: png)')
+    parser.add_argument('--workers', type=int, help='rendering processes (default: one per CPU)')
+    parser.add_argument('--force', action='store_true', help='re-render figures even if their inputs are unchanged')
+    parser.add_argument('--figure', action='append', choices=sorted(FIGURES), help='only render these figures')
+    parser.add_argument('--summary', action='store_true', help='print a summary of the dataset first')
+    args = parser.parse_args()
+
+    if args.summary:
+        from keywords import load_term_index
+
+        startups_data = load_startups()
+        # Display the first few rows of the dataset to understand its structure
+        print(startups_data.head())
+        # Validate the data
+        print(startups_data.describe(include='all'))
+        print(load_term_index(startups_data).top_words(20))
+
+    start = time.perf_counter()
+    timings = build_report(args.output, tuple(args.format or ['png']), args.workers, args.force, args.figure)
+    for name, seconds in sorted(timings.items(), key=lambda item: -item[1]):
+        print(f'{name:<28}{seconds:6.2f}s')
+    skipped = len(args.figure or FIGURES) - len(timings)
+    print(f'Rendered {len(timings)} figures ({skipped} unchanged) in {time.perf_counter() - start:.2f}s to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
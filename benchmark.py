@@ -0,0 +1,370 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DASHBOARD = os.path.join(ROOT, 'streamlit.py')
+DATASET = os.path.join(ROOT, 'websummit_startups_2024.csv')
+
+ANALYSIS_TYPES = ["Overview", "Category Analysis", "Country Analysis", "Pitch Analysis", "Potential Collaborations", "Emerging Categories", "Focus on Web3 Startups", "Comparison", "Startup Explorer"]
+SUITES = ['scraper', 'analytics', 'dashboard', 'startup']
+# Modules whose import time is measured in a fresh interpreter
+STARTUP_MODULES = ['dataset', 'cube', 'keywords', 'search', 'similarity', 'wordclouds', 'network', 'analyse', 'relation']
+# Libraries that dominate start-up time when imported
+HEAVY_MODULES = ['sklearn', 'scipy.sparse', 'matplotlib.pyplot', 'seaborn', 'wordcloud', 'networkx', 'pyarrow']
+DEFAULT_SCALES = [1, 10, 100]
+# All-pairs similarity is quadratic; skip it above this many rows
+PAIRS_LIMIT = 25000
+# Differences below this many seconds are noise, never regressions
+NOISE_FLOOR = 0.02
+
+# Offline benchmarks for the scraper (fixture pages and a local server), the
+# analytics (bundled CSV plus synthetic scaled-up copies) and the dashboard
+# (scripted reruns through streamlit's AppTest). Every stage records wall time
+# and peak RSS: the stage's own on Linux, where the high-water mark is reset
+# before each stage, elsewhere the process's peak so far. Stages run in a
+# fresh interpreter report that interpreter's peak. Results can be saved as a
+# baseline and compared against later.
+
+
+def reset_peak_rss():
+    # Linux only: clears the VmHWM high-water mark read by peak_rss_mb()
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+def peak_rss_mb():
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if resource is None:
+        return float('nan')
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1 << 20) if sys.platform == 'darwin' else peak / 1024
+
+
+class Recorder:
+    def __init__(self):
+        self.results = {}
+
+    @contextmanager
+    def stage(self, name):
+        reset_peak_rss()
+        start = time.perf_counter()
+        yield
+        self.record(name, time.perf_counter() - start)
+
+    def record(self, name, seconds, peak=None):
+        self.results[name] = {'seconds': seconds, 'peak_rss_mb': peak_rss_mb() if peak is None else peak}
+        print(f'{name:<48}{seconds:10.3f}s{self.results[name]["peak_rss_mb"]:10.0f} MB', flush=True)
+
+
+def bench_scraper(recorder, max_pages=5):
+    import fixtures
+    import parsers
+    import scraping
+    from crawler import Fetcher
+
+    listings, details = parsers.fixture_pages(DATASET)
+    for backend in parsers.available_backends():
+        with recorder.stage(f'scraper/parse_listing/{backend}'):
+            for html in listings:
+                parsers.parse_listing(html, backend)
+        with recorder.stage(f'scraper/parse_details/{backend}'):
+            for html in details:
+                parsers.parse_details(html, backend)
+
+    server = fixtures.serve(fixtures.load_rows(DATASET))
+    try:
+        with Fetcher(concurrency=16, rate=0) as fetcher:
+            with recorder.stage(f'scraper/crawl/{max_pages}_pages'):
+                for _ in scraping.crawl(fetcher, server.base_url, max_pages):
+                    pass
+    finally:
+        server.shutdown()
+
+    # A server that throttles beyond 8 concurrent requests and fails 5% of them
+    server = fixtures.serve(fixtures.load_rows(DATASET), latency=0.02, error_rate=0.05, capacity=8)
+    try:
+        for adaptive in (False, True):
+            name = 'adaptive' if adaptive else 'fixed'
+            report = scraping.CrawlReport()
+            with Fetcher(concurrency=16, rate=0, backoff=0.1, adaptive=adaptive) as fetcher:
+                with recorder.stage(f'scraper/crawl_faulty/{name}/{max_pages}_pages'):
+                    for _ in scraping.crawl(fetcher, server.base_url, max_pages, report=report):
+                        pass
+            print(report.summary(), file=sys.stderr)
+    finally:
+        server.shutdown()
+
+
+def scaled_copy(directory, scale):
+    # Synthetic dataset with `scale` copies of every row under distinct names and links
+    import pandas as pd
+
+    path = os.path.join(directory, f'websummit_startups_x{scale}.csv')
+    if not os.path.exists(path):
+        original = pd.read_csv(DATASET)
+        copies = []
+        for i in range(scale):
+            copy = original.copy()
+            if i:
+                copy['Startup Name'] = copy['Startup Name'] + f' #{i}'
+                copy['Link'] = copy['Link'] + f'-{i}'
+            copies.append(copy)
+        pd.concat(copies, ignore_index=True).to_csv(path, index=False)
+    return path
+
+
+def rescrape(startups_data, fraction):
+    # The dataset after a re-scrape that edited and appended `fraction` of its rows
+    import pandas as pd
+
+    n = max(1, int(len(startups_data) * fraction))
+    updated = startups_data.copy()
+    updated.loc[updated.index[:n], 'Pitch'] = updated['Pitch'][:n].fillna('') + ' now with realtime analytics'
+    added = startups_data.sample(n, random_state=0)
+    added = added.assign(Link=added['Link'].astype(str) + '-new', **{'Startup Name': added['Startup Name'].astype(str) + ' (new)'})
+    return pd.concat([updated, added], ignore_index=True)
+
+
+def bench_analytics(recorder, scales, directory):
+    import numpy as np
+    import pandas as pd
+
+    import wordclouds
+    from cube import CountCube
+    from dataset import load_startups, query, write_store
+    from incremental import Analytics
+    from keywords import TermIndex
+    from similarity import SimilarityIndex
+
+    for scale in scales:
+        path = scaled_copy(directory, scale)
+        prefix = f'analytics/x{scale}'
+        with recorder.stage(f'{prefix}/read_csv'):
+            pd.read_csv(path)
+        with recorder.stage(f'{prefix}/load_cold'):
+            startups_data = load_startups(path)
+        with recorder.stage(f'{prefix}/load_warm'):
+            load_startups(path)
+        store = os.path.join(directory, f'store-x{scale}')
+        with recorder.stage(f'{prefix}/store_write'):
+            write_store(path, store)
+        with recorder.stage(f'{prefix}/store_query_country'):
+            query(country='Switzerland', columns=['Startup Name', 'Category', 'Pitch'], directory=store)
+        with recorder.stage(f'{prefix}/term_index'):
+            term_index = TermIndex.build(startups_data)
+        countries = startups_data['Country'].value_counts().index[:50]
+        with recorder.stage(f'{prefix}/top_words_per_country'):
+            for country in countries:
+                term_index.top_words(20, country=country)
+        with recorder.stage(f'{prefix}/incremental_build'):
+            analytics = Analytics()
+            analytics.sync(startups_data)
+        # A re-scrape during the event: 1% new startups and 1% edited pitches
+        rescraped = rescrape(startups_data, 0.01)
+        with recorder.stage(f'{prefix}/incremental_sync_1pct'):
+            analytics.sync(rescraped)
+        with recorder.stage(f'{prefix}/incremental_top_words_per_country'):
+            for country in countries:
+                analytics.top_words(20, country=country)
+        with recorder.stage(f'{prefix}/group_means'):
+            term_index.group_means('Category', list(term_index.top_words(20)['Word']))
+        with recorder.stage(f'{prefix}/pivot'):
+            startups_data.pivot_table(index='Category', columns='Country', aggfunc='size', fill_value=0, observed=True)
+        with recorder.stage(f'{prefix}/cube_build'):
+            cube = CountCube.build(startups_data)
+        with recorder.stage(f'{prefix}/cube_queries'):
+            cube.pivot('Category', 'Country')
+            cube.top_k('Category', by='Country', k=3)
+            cube.emerging(10)
+        with recorder.stage(f'{prefix}/similarity_build'):
+            similarity_index = SimilarityIndex.build(startups_data)
+        rows = np.random.default_rng(0).integers(0, len(startups_data), 100)
+        with recorder.stage(f'{prefix}/similarity_query_x100'):
+            for row in rows:
+                similarity_index.query(int(row), k=10)
+        if len(startups_data) <= PAIRS_LIMIT:
+            with recorder.stage(f'{prefix}/similarity_pairs'):
+                similarity_index.top_k_pairs(k=5)
+        if scale == scales[0]:
+            freqs = wordclouds.frequencies(term_index)
+            with recorder.stage('analytics/wordcloud_draw'):
+                wordclouds.draw(freqs, wordclouds.WIDTH, wordclouds.HEIGHT)
+
+
+def import_app_test():
+    # The dashboard script is called streamlit.py, which shadows the streamlit
+    # package whenever this directory is first on sys.path.
+    shadowing = [entry for entry in sys.path if os.path.abspath(entry or '.') == ROOT]
+    sys.path[:] = [entry for entry in sys.path if entry not in shadowing]
+    try:
+        from streamlit.testing.v1 import AppTest
+    finally:
+        sys.path[:0] = shadowing
+    return AppTest
+
+
+def measure_dashboard(analysis_type, timeout=300):
+    # Seconds of the rerun after selecting `analysis_type` in a new app: 'cold'
+    # the first time, 'warm' when the same selection is rerun
+    AppTest = import_app_test()
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    app = AppTest.from_file(DASHBOARD, default_timeout=timeout)
+    app.run()
+    timings = {}
+    for phase in ('cold', 'warm'):
+        start = time.perf_counter()
+        app.selectbox[0].select(analysis_type).run()
+        timings[phase] = time.perf_counter() - start
+        if app.exception:
+            raise RuntimeError(f'{analysis_type}: {app.exception[0].message}')
+    return timings
+
+
+def dashboard_latency(analysis_types=ANALYSIS_TYPES, timeout=300):
+    # Each analysis type is measured in a new process with an empty cache
+    # directory, so that no in-process memo or file left by another one makes
+    # its cold run look warm
+    results = {}
+    for analysis_type in analysis_types:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            results[analysis_type] = run_fresh(
+                f'import json, benchmark; timings = benchmark.measure_dashboard({analysis_type!r}, {timeout}); '
+                'print(json.dumps([timings, benchmark.peak_rss_mb()]))',
+                cache_dir=cache_dir,
+            )[0]
+    return results
+
+
+def bench_dashboard(recorder, analysis_types=ANALYSIS_TYPES):
+    for analysis_type, (timings, peak) in dashboard_latency(analysis_types).items():
+        for phase, seconds in timings.items():
+            recorder.record(f'dashboard/{analysis_type}/{phase}', seconds, peak)
+
+
+def run_fresh(code, importtime=False, cache_dir=None):
+    # Runs `code` in a new interpreter, optionally with its own cache directory;
+    # it prints one JSON value
+    command = [sys.executable] + (['-X', 'importtime'] if importtime else []) + ['-c', code]
+    env = dict(os.environ, WEBSUMMIT_CACHE_DIR=cache_dir) if cache_dir else None
+    completed = subprocess.run(command, cwd=ROOT, env=env, capture_output=True, text=True)
+    if completed.returncode:
+        raise RuntimeError(f'{code!r} failed:\n{completed.stderr[-2000:]}')
+    return json.loads(completed.stdout.strip().splitlines()[-1]), completed.stderr
+
+
+def cumulative_import_us(importtime_log, module):
+    # Cumulative microseconds of `module` in python -X importtime output
+    for line in importtime_log.splitlines():
+        fields = line.split('|')
+        if len(fields) == 3 and fields[2].rstrip() == f' {module}':
+            return int(fields[1])
+    return 0
+
+
+def bench_startup(recorder, analysis_types=ANALYSIS_TYPES):
+    heavy = json.dumps(HEAVY_MODULES)
+    for module in STARTUP_MODULES:
+        (loaded, peak), log = run_fresh(
+            f'import json, sys, benchmark, {module}; print(json.dumps([[m for m in {heavy} if m in sys.modules], benchmark.peak_rss_mb()]))',
+            importtime=True,
+        )
+        recorder.record(f'startup/import/{module}', cumulative_import_us(log, module) / 1e6, peak)
+        print(f"{'':<8}loads {', '.join(loaded) or 'no heavy libraries'}")
+    # First render of each analysis in a fresh process, imports included
+    for analysis_type in analysis_types:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            seconds, loaded, peak = run_fresh(
+                'import time; start = time.perf_counter()\n'
+                'import json, sys, benchmark\n'
+                'app = benchmark.import_app_test().from_file(benchmark.DASHBOARD, default_timeout=300)\n'
+                f'app.run(); app.selectbox[0].select({analysis_type!r}).run()\n'
+                f'print(json.dumps([time.perf_counter() - start, [m for m in {heavy} if m in sys.modules], benchmark.peak_rss_mb()]))',
+                cache_dir=cache_dir,
+            )[0]
+        recorder.record(f'startup/dashboard/{analysis_type}', seconds, peak)
+        print(f"{'':<8}loads {', '.join(loaded) or 'no heavy libraries'}")
+
+
+def compare(results, baseline, tolerance):
+    # Returns the stages that got slower than baseline * (1 + tolerance)
+    regressions = []
+    print(f"\n{'stage':<48}{'baseline':>10}{'current':>10}{'ratio':>8}")
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        before, after = baseline[name]['seconds'], result['seconds']
+        ratio = after / before if before else float('inf')
+        slower = after > before * (1 + tolerance) and after - before > NOISE_FLOOR
+        if slower:
+            regressions.append(name)
+        print(f"{name:<48}{before:10.3f}{after:10.3f}{ratio:8.2f}{'  REGRESSION' if slower else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline benchmarks for the scraper, analytics and dashboard.')
+    parser.add_argument('--suite', action='append', choices=SUITES, help='suite to run, repeatable (default: all)')
+    parser.add_argument('--scale', action='append', type=int, help='dataset multiplier for the analytics suite, repeatable (default: 1, 10, 100)')
+    parser.add_argument('--analysis', action='append', choices=ANALYSIS_TYPES, help='dashboard analysis type to measure (default: all)')
+    parser.add_argument('--max-pages', type=int, default=5, help='listing pages crawled from the local fixture server')
+    parser.add_argument('--json', help='write results to this file')
+    parser.add_argument('--save-baseline', help='store results as the baseline in this file')
+    parser.add_argument('--compare', help='compare results against the baseline in this file')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed slowdown before a stage counts as a regression')
+    args = parser.parse_args()
+
+    suites = args.suite or SUITES
+    # Relative to the caller's directory, not the one the benchmarks run in
+    args.json, args.save_baseline, args.compare = (
+        os.path.abspath(path) if path else None for path in (args.json, args.save_baseline, args.compare)
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        # Cold stages must not see caches from earlier runs, nor pollute the real ones
+        os.environ['WEBSUMMIT_CACHE_DIR'] = os.path.join(directory, 'cache')
+        os.chdir(ROOT)
+        recorder = Recorder()
+        if 'scraper' in suites:
+            bench_scraper(recorder, args.max_pages)
+        if 'analytics' in suites:
+            bench_analytics(recorder, sorted(args.scale or DEFAULT_SCALES), directory)
+        if 'dashboard' in suites:
+            bench_dashboard(recorder, args.analysis or ANALYSIS_TYPES)
+        if 'startup' in suites:
+            bench_startup(recorder, args.analysis or ANALYSIS_TYPES)
+
+    for path in (args.json, args.save_baseline):
+        if path:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(recorder.results, f, indent=2)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            regressions = compare(recorder.results, json.load(f), args.tolerance)
+        if regressions:
+            print(f'\n{len(regressions)} stage(s) regressed beyond {args.tolerance:.0%}')
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from httpcache import Page, content_digest
+from instrumentation import incr, span
+from scheduler import DETAIL, AdaptiveConcurrency, PriorityExecutor, parse_retry_after
+
+# Statuses worth retrying: throttling and transient server errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Statuses by which a server asks us to slow down
+THROTTLE_STATUSES = {429, 503}
+
+
+class HostRateLimiter:
+    # Spaces out requests to the same host so that at most `rate` start per second
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self.next_slot = {}
+        self.lock = threading.Lock()
+
+    def wait(self, url):
+        if not self.interval:
+            return
+        host = urlsplit(url).netloc
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot.get(host, now))
+            self.next_slot[host] = slot + self.interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+class Fetcher:
+    # Pooled HTTP client with per-host rate limiting, retries and a priority work
+    # queue. With `adaptive`, requests in flight start at `concurrency` and adapt
+    # between 1 and `max_concurrency` to the server's throttling and errors.
+    def __init__(self, concurrency=8, rate=10.0, retries=3, backoff=0.5, timeout=30, cache=None, adaptive=False, max_concurrency=None):
+        max_concurrency = max(concurrency, max_concurrency or (4 * concurrency if adaptive else concurrency))
+        self.cache = cache
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.limiter = HostRateLimiter(rate)
+        self.control = AdaptiveConcurrency(concurrency, maximum=max_concurrency, adaptive=adaptive)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_concurrency, pool_maxsize=max_concurrency)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.executor = PriorityExecutor(max_workers=max_concurrency)
+
+    def request(self, url, headers=None):
+        attempt = 0
+        while True:
+            # Slot first: threads held back by the limit or a Retry-After pause
+            # must not reserve rate slots they would all use at once afterwards
+            started = self.control.acquire()
+            outcome, retry_after, response = 'error', None, None
+            try:
+                self.limiter.wait(url)
+                incr('http.requests')
+                with span('http.request'):
+                    response = self.session.get(url, headers=headers, timeout=self.timeout)
+                incr('http.bytes', len(response.content))
+                if response.status_code not in RETRY_STATUSES:
+                    outcome = 'ok'
+                else:
+                    # Retry-After pauses every request through the controller, not just this one
+                    retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                    if response.status_code in THROTTLE_STATUSES:
+                        outcome = 'throttled'
+            except requests.exceptions.RequestException:
+                # Connection failures, timeouts, broken or undecodable bodies
+                response = None
+                incr('http.errors')
+                if attempt >= self.retries:
+                    raise
+            finally:
+                self.control.release(started, outcome, retry_after)
+            if outcome == 'ok':
+                response.raise_for_status()
+                return response
+            if response is not None:
+                incr('http.throttled' if outcome == 'throttled' else 'http.errors')
+                if attempt >= self.retries:
+                    response.raise_for_status()
+            incr('http.retries')
+            if retry_after is None:
+                # Jittered, so that requests failing together do not retry together
+                time.sleep(self.backoff * 2 ** attempt * random.uniform(0.5, 1.5))
+            attempt += 1
+
+    def fetch(self, url):
+        # Revalidates against the cache when one is configured; `changed` is False
+        # when the server answered 304 or sent back a byte-identical body.
+        if self.cache is None:
+            text = self.request(url).text
+            return Page(text, content_digest(text), True)
+        entry = self.cache.load(url)
+        response = self.request(url, self.cache.conditional_headers(entry))
+        if response.status_code == 304 and entry is not None:
+            incr('http.cache_hits')
+            return Page(entry['text'], entry['digest'], False)
+        digest = self.cache.store(url, response.text, response.headers)
+        changed = entry is None or entry['digest'] != digest
+        incr('http.cache_misses' if changed else 'http.cache_hits')
+        return Page(response.text, digest, changed)
+
+    def get(self, url):
+        return self.fetch(url).text
+
+    def submit(self, fn, *args, priority=DETAIL, **kwargs):
+        return self.executor.submit(fn, *args, priority=priority, **kwargs)
+
+    def close(self, cancel=False):
+        # `cancel` drops the requests still queued instead of running them
+        self.executor.shutdown(wait=True, cancel_futures=cancel)
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Interrupted (Ctrl-C, a failing sink): stop crawling right away
+        self.close(cancel=exc_type is not None)
@@ -0,0 +1,285 @@
+import argparse
+import hashlib
+import json
+import os
+from urllib.parse import unquote
+
+import pandas as pd
+
+from instrumentation import incr, span
+from schema import COLUMNS, EVENT_PATTERN, SOCIAL_COLUMNS, event_year, parse_social_links
+
+# Shared, preprocessed view of the scraped startups. A source file (CSV, JSON
+# Lines or Parquet, as written by the scraper's sinks) is parsed once; the result
+# (categoricals, flattened social links) is persisted next to it as Parquet (or
+# pickle without pyarrow) and reused until the source file changes.
+# A source may also be a partitioned store (see sinks.PartitionedSink), which
+# query() reads with the filters pushed down to partitions and row groups.
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_PATH = os.path.join(ROOT, 'websummit_startups_2024.csv')
+# Derived artifacts of every module live under this directory
+CACHE_ROOT = os.environ.get('WEBSUMMIT_CACHE_DIR', os.path.join(ROOT, '.cache'))
+CACHE_DIR = os.path.join(CACHE_ROOT, 'datasets')
+# Bumped whenever preprocess() changes, invalidating cached frames
+CACHE_FORMAT = 2
+# Partitioned store of every event and edition, written by the scraper
+STORE_DIR = os.environ.get('WEBSUMMIT_STORE', os.path.join(ROOT, 'store'))
+
+CATEGORICAL_COLUMNS = ['Event', 'Country', 'Category']
+FILTER_COLUMNS = ['Event', 'Year', 'Country', 'Category']
+
+
+def default_paths():
+    # WEBSUMMIT_DATASET may list several CSVs (e.g. one per edition), separated like
+    # PATH; otherwise the store once the scraper has written one, else the bundled CSV
+    paths = os.environ.get('WEBSUMMIT_DATASET')
+    if paths:
+        return paths.split(os.pathsep)
+    return [STORE_DIR] if os.path.isdir(STORE_DIR) else [DEFAULT_PATH]
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _cache_paths(path):
+    key = hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()[:16]
+    base = os.path.join(CACHE_DIR, f'{os.path.splitext(os.path.basename(path))[0]}-{key}')
+    return base + '.json', base
+
+
+def store_version(directory):
+    # Hash of the store's file listing; partitions are replaced, never edited in place
+    digest = hashlib.sha256()
+    for parent, _, files in sorted(os.walk(directory)):
+        for name in sorted(files):
+            stat = os.stat(os.path.join(parent, name))
+            digest.update(f'{os.path.relpath(parent, directory)}/{name}:{stat.st_size}:{stat.st_mtime_ns}\n'.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def source_version(path):
+    # Content hash of `path`, recomputed only when its mtime or size changed
+    if os.path.isdir(path):
+        return store_version(path), {}
+    meta_path, _ = _cache_paths(path)
+    stat = os.stat(path)
+    try:
+        with open(meta_path, encoding='utf-8') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        meta = {}
+    if meta.get('mtime_ns') == stat.st_mtime_ns and meta.get('size') == stat.st_size:
+        return meta['sha256'], meta
+    meta = dict(meta, mtime_ns=stat.st_mtime_ns, size=stat.st_size, sha256=file_digest(path))
+    return meta['sha256'], meta
+
+
+def as_paths(paths):
+    paths = paths or default_paths()
+    return [paths] if isinstance(paths, str) else list(paths)
+
+
+def dataset_version(paths=None):
+    versions = [source_version(path)[0] for path in as_paths(paths)]
+    return versions[0] if len(versions) == 1 else hashlib.sha256(''.join(versions).encode()).hexdigest()
+
+
+def frame_version(startups_data):
+    # Cache key derived from the rows themselves, for frames that are not a
+    # known dataset version (filtered, edited or built elsewhere)
+    digest = hashlib.sha256(json.dumps([str(column) for column in startups_data.columns]).encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(startups_data, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def data_version(startups_data=None, version=None):
+    # Key of whatever an index is built from: the given version, else the
+    # frame's own, else the default dataset's
+    if version is not None:
+        return version
+    if startups_data is not None:
+        return frame_version(startups_data)
+    return dataset_version()
+
+
+def preprocess(raw):
+    # Also accepts a column projection; derived columns need their source column
+    df = raw.copy()
+    if 'Link' in df:
+        df['Event'] = df['Link'].str.extract(EVENT_PATTERN, expand=False)
+    if 'Event' in df and 'Year' not in df:
+        df['Year'] = df['Event'].map(event_year).astype('Int16')
+    if 'Social Links' in df:
+        social_links = df['Social Links'].map(parse_social_links)
+        for platform, column in SOCIAL_COLUMNS.items():
+            df[column] = social_links.map(lambda links: links.get(platform))
+        df['Social Links'] = social_links.map(json.dumps)
+    for column in CATEGORICAL_COLUMNS:
+        if column in df:
+            df[column] = df[column].astype('category')
+    return df
+
+
+def read_source(path):
+    # CSV, or the JSON Lines and Parquet files written by the scraper's sinks
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.jsonl', '.json'):
+        return pd.read_json(path, lines=True, dtype=False)
+    if extension == '.parquet':
+        return pd.read_parquet(path)
+    return pd.read_csv(path)
+
+
+def _read_cache(base):
+    try:
+        if os.path.exists(base + '.parquet'):
+            return pd.read_parquet(base + '.parquet')
+        if os.path.exists(base + '.pkl'):
+            return pd.read_pickle(base + '.pkl')
+    except Exception:
+        pass
+    return None
+
+
+def _write_cache(df, base):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    try:
+        df.to_parquet(base + '.parquet', index=False)
+    except ImportError:
+        df.to_pickle(base + '.pkl')
+
+
+def load_file(path):
+    if os.path.isdir(path):
+        return query(directory=path)
+    meta_path, base = _cache_paths(path)
+    version, meta = source_version(path)
+    with span('dataset.read_cache'):
+        df = _read_cache(base) if meta.get('cached') == [CACHE_FORMAT, version] else None
+    incr('dataset.cache_misses' if df is None else 'dataset.cache_hits')
+    if df is None:
+        with span('dataset.read_source'):
+            raw = read_source(path)
+        with span('dataset.preprocess'):
+            df = preprocess(raw)
+        _write_cache(df, base)
+        meta['cached'] = [CACHE_FORMAT, version]
+        with open(meta_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+    incr('dataset.rows', len(df))
+    return df
+
+
+def load_startups(paths=None):
+    frames = [load_file(path) for path in as_paths(paths)]
+    if len(frames) == 1:
+        return frames[0]
+    # Categories differ between files; re-encode over the union after concatenating
+    df = pd.concat(frames, ignore_index=True)
+    for column in CATEGORICAL_COLUMNS:
+        df[column] = df[column].astype('category')
+    return df
+
+
+def store_events(directory=None):
+    # Events in the store, from its directory names alone
+    directory = directory or STORE_DIR
+    if not os.path.isdir(directory):
+        return []
+    return sorted(unquote(name.partition('=')[2]) for name in os.listdir(directory) if name.startswith('Event='))
+
+
+def scoped_version(version, **filters):
+    # Cache key of a filtered view of the dataset version
+    scope = json.dumps({column: as_values(values) for column, values in sorted(filters.items()) if values is not None})
+    return version if scope == '{}' else hashlib.sha256(f'{version}:{scope}'.encode('utf-8')).hexdigest()
+
+
+def as_values(value):
+    return None if value is None else [value] if isinstance(value, (str, int)) else list(value)
+
+
+def store_filter(filters):
+    # pyarrow expression; partition columns prune directories, the rest prune
+    # row groups by their statistics
+    import pyarrow.dataset as ds
+
+    expression = None
+    for column, values in filters.items():
+        condition = ds.field(column).isin(values)
+        expression = condition if expression is None else expression & condition
+    return expression
+
+
+def query(event=None, year=None, country=None, category=None, columns=None, directory=None):
+    # Startups matching every given filter (a value or a list of values), with only
+    # `columns` read. Without a store, the CSV sources are loaded and filtered.
+    directory = directory or STORE_DIR
+    filters = {
+        column: values for column, values in zip(FILTER_COLUMNS, map(as_values, (event, year, country, category)))
+        if values is not None
+    }
+    if os.path.isdir(directory):
+        import pyarrow.dataset as ds
+
+        with span('dataset.query'):
+            store = ds.dataset(directory, format='parquet', partitioning='hive')
+            table = store.to_table(columns=columns, filter=store_filter(filters))
+            df = preprocess(table.to_pandas())
+    else:
+        df = load_startups()
+        mask = pd.Series(True, index=df.index)
+        for column, values in filters.items():
+            mask &= df[column].isin(values)
+        df = df.loc[mask, columns if columns is not None else df.columns].reset_index(drop=True)
+        for column in CATEGORICAL_COLUMNS:
+            if column in df:
+                df[column] = df[column].cat.remove_unused_categories()
+    incr('dataset.query_rows', len(df))
+    return df
+
+
+def write_store(paths, directory=None):
+    # Adds CSV, JSON Lines or Parquet sources to the partitioned store, replacing the partitions they cover
+    from sinks import PartitionedSink
+
+    with PartitionedSink(directory or STORE_DIR) as sink:
+        for path in as_paths(paths):
+            raw = read_source(path)
+            raw = raw.astype(object).where(raw.notna(), None)
+            for row in raw[COLUMNS].itertuples(index=False):
+                row = list(row)
+                row[COLUMNS.index('Social Links')] = parse_social_links(row[COLUMNS.index('Social Links')])
+                sink.write(row)
+    return sink
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Import CSVs into the partitioned store, or export a filtered slice of it.')
+    parser.add_argument('--store', default=STORE_DIR)
+    commands = parser.add_subparsers(dest='command', required=True)
+    add = commands.add_parser('import', help='add CSV, JSON Lines or Parquet files to the store')
+    add.add_argument('paths', nargs='+')
+    export = commands.add_parser('query', help='write the matching startups as CSV')
+    for column in FILTER_COLUMNS:
+        export.add_argument(f'--{column.lower()}', action='append', type=int if column == 'Year' else str)
+    export.add_argument('--output', required=True)
+    args = parser.parse_args()
+
+    if args.command == 'import':
+        sink = write_store(args.paths, args.store)
+        print(f"Stored {sink.count} startups in {args.store} ({'updated' if sink.replaced else 'unchanged'})")
+    else:
+        df = query(args.event, args.year, args.country, args.category, directory=args.store)
+        df[COLUMNS].to_csv(args.output, index=False)
+        print(f'Wrote {len(df)} startups to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+import argparse
+import hashlib
+import html
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+import pandas as pd
+
+from schema import parse_social_links
+
+# Stand-in for websummit.com: renders listing and detail pages with the same markup
+# the scraper's selectors target, built from the rows of a saved CSV. It can also
+# misbehave like a loaded production server: added latency, random 5xx errors,
+# 429s with Retry-After beyond a number of concurrent requests, and pages that
+# fail their first few requests.
+
+PAGE_SIZE = 100
+
+LISTING_ITEM = (
+    '<figure class="ListItemStyles__StyledListItemWrapper-sc-94ce60d2-2">'
+    '<a href="{link}">{name}</a>'
+    '<span class="ListItemStyles__ItemDescription-sc-94ce60d2-5">{category}</span>'
+    '</figure>'
+)
+
+COUNTRY_TAG = '<a class="ContentTagList__ContentTagListItem-sc-6e6a07b7-1"><p class="bodyCopy__P-sc-986c63f9-1">{}</p></a>'
+SOCIAL_BUTTONS = '<div class="SocialButton__SocialButtonWrapper-sc-29e85cc1-0">{}</div>'
+PITCH_BLOCK = '<div class="ProfileDetails__ProfileDetailsContent-sc-8beaea78-1">{}</div>'
+
+
+def load_rows(filename='websummit_startups_2024.csv'):
+    rows = pd.read_csv(filename).fillna('')
+    rows['Path'] = rows['Link'].map(lambda link: urlsplit(link).path)
+    return rows.to_dict('records')
+
+
+def render_listing_page(rows, page):
+    chunk = rows[(page - 1) * PAGE_SIZE:page * PAGE_SIZE]
+    items = ''.join(LISTING_ITEM.format(link=html.escape(row['Path']), name=html.escape(row['Startup Name']), category=html.escape(row['Category'])) for row in chunk)
+    return f'<html><body>{items}</body></html>'
+
+
+def render_detail_page(row):
+    # Missing values are left out of the page, as on the real site
+    social_links = parse_social_links(row['Social Links'])
+    parts = []
+    if row['Country']:
+        parts.append(COUNTRY_TAG.format(html.escape(row['Country'])))
+    parts.append(SOCIAL_BUTTONS.format(''.join(f'<a href="{html.escape(url)}"></a>' for url in social_links.values())))
+    if row['Pitch']:
+        parts.append(PITCH_BLOCK.format(html.escape(row['Pitch'])))
+    return '<html><body>{}</body></html>'.format(''.join(parts))
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        fault = self.server.enter(self.path)
+        try:
+            if fault is None:
+                self.respond()
+            else:
+                self.send_response(fault)
+                if fault in (429, 503):
+                    self.send_header('Retry-After', str(self.server.retry_after))
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+        finally:
+            self.server.leave()
+
+    def respond(self):
+        body = self.server.render(self.path)
+        if body is None:
+            self.send_error(404)
+            return
+        data = body.encode('utf-8')
+        etag = '"{}"'.format(hashlib.sha1(data).hexdigest())
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('ETag', etag)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FixtureServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, rows, address=('127.0.0.1', 0), latency=0.0, error_rate=0.0, capacity=None, retry_after=1, failures_per_path=0, seed=0):
+        super().__init__(address, FixtureHandler)
+        self.rows = rows
+        self.details = {row['Path']: row for row in rows}
+        # Fault injection; every request waits up to `latency` seconds
+        self.latency = latency
+        self.error_rate = error_rate
+        self.capacity = capacity
+        self.retry_after = retry_after
+        self.failures_per_path = failures_per_path
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.attempts = {}
+        self.faults = {}
+
+    def enter(self, path):
+        # Returns the error status to answer with, if any
+        with self.lock:
+            self.in_flight += 1
+            self.attempts[path] = self.attempts.get(path, 0) + 1
+            if self.capacity is not None and self.in_flight > self.capacity:
+                fault = 429
+            elif self.attempts[path] <= self.failures_per_path:
+                fault = 500
+            elif self.random.random() < self.error_rate:
+                fault = self.random.choice((500, 502, 503))
+            else:
+                fault = None
+            if fault is not None:
+                self.faults[fault] = self.faults.get(fault, 0) + 1
+            delay = self.random.uniform(0, self.latency) if self.latency else 0.0
+        if delay:
+            time.sleep(delay)
+        return fault
+
+    def leave(self):
+        with self.lock:
+            self.in_flight -= 1
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}/startups/featured-startups/page/'
+
+    def render(self, path):
+        if path.startswith('/startups/featured-startups/page/'):
+            page = int(path.rstrip('/').rsplit('/', 1)[1])
+            if (page - 1) * PAGE_SIZE >= len(self.rows):
+                return None
+            return render_listing_page(self.rows, page)
+        row = self.details.get(path)
+        return render_detail_page(row) if row else None
+
+
+def serve(rows, **faults):
+    server = FixtureServer(rows, **faults)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve fixture pages from a CSV, optionally with injected faults.')
+    parser.add_argument('--fixtures', default='websummit_startups_2024.csv', help='CSV the pages are rendered from')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--latency', type=float, default=0.0, help='max seconds added to every response')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of requests answered with 500/502/503')
+    parser.add_argument('--capacity', type=int, help='concurrent requests served before answering 429')
+    parser.add_argument('--retry-after', type=int, default=1, help='Retry-After seconds sent with 429 and 503')
+    parser.add_argument('--failures-per-path', type=int, default=0, help='requests to each page that fail before it is served')
+    args = parser.parse_args()
+
+    server = FixtureServer(
+        load_rows(args.fixtures), ('127.0.0.1', args.port), args.latency, args.error_rate,
+        args.capacity, args.retry_after, args.failures_per_path,
+    )
+    print(f'Serving {len(server.rows)} startups at {server.base_url}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+import hashlib
+import json
+import os
+import threading
+from collections import namedtuple
+
+# On-disk response cache keyed by URL. Each entry keeps the body plus the validators
+# needed for a conditional request (ETag / Last-Modified) and a content hash, so
+# servers that send neither can still be checked for changes.
+
+Page = namedtuple('Page', ['text', 'digest', 'changed'])
+
+
+def content_digest(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class HttpCache:
+    def __init__(self, directory='.cache/http'):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, url, suffix):
+        key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, key[:2], key + suffix)
+
+    def load(self, url):
+        try:
+            with open(self._path(url, '.json'), encoding='utf-8') as f:
+                entry = json.load(f)
+            with open(self._path(url, '.html'), encoding='utf-8') as f:
+                entry['text'] = f.read()
+        except (OSError, ValueError):
+            return None
+        return entry
+
+    def store(self, url, text, headers):
+        entry = {
+            'url': url,
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+            'digest': content_digest(text),
+        }
+        meta_path = self._path(url, '.json')
+        os.makedirs(os.path.dirname(meta_path), exist_ok=True)
+        # Body first, then metadata: an entry only counts once its metadata exists
+        for path, content in ((self._path(url, '.html'), text), (meta_path, json.dumps(entry))):
+            tmp_path = f'{path}.{threading.get_ident()}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        return entry['digest']
+
+    def conditional_headers(self, entry):
+        headers = {}
+        if entry is None:
+            return headers
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
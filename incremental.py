@@ -0,0 +1,353 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import Counter
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from cube import DIMENSIONS, CountCube
+from dataset import CACHE_ROOT, as_paths, as_values, load_startups
+from instrumentation import incr, span
+from keywords import GROUP_COLUMNS, group_sums, make_vectorizer
+
+# Keyword counts and aggregates that follow a growing dataset by merging deltas
+# instead of being rebuilt. Pitches are tokenized like the term index but hashed
+# into a fixed feature space, so there is no vocabulary to refit; matrices only
+# have a column per feature seen so far, appended in order of first sight. The
+# state keeps corpus totals, per-group term sums and sizes, and the count cube.
+# A sync compares row digests keyed by Link, counts out the rows that changed
+# or disappeared and counts in the new versions, so only the delta is tokenized.
+# Rows are persisted as append-only chunks next to a snapshot of the aggregates.
+
+CACHE_DIR = os.path.join(CACHE_ROOT, 'incremental')
+# Bumped whenever tokenization or the saved layout changes
+STATE_FORMAT = 1
+# Few enough collisions between the corpus' terms
+N_FEATURES = 2 ** 22
+# A row's contribution to the aggregates depends only on these
+DIGEST_COLUMNS = ['Pitch', 'Country', 'Category']
+SLOT_COLUMNS = ['Link'] + DIMENSIONS
+# Saved rows are compacted into one chunk past this many
+MAX_CHUNKS = 32
+
+
+def row_digests(startups_data):
+    return pd.util.hash_pandas_object(startups_data[DIGEST_COLUMNS].astype(object), index=False).to_numpy()
+
+
+def column_sums(matrix):
+    return sp.csr_matrix(np.ones((1, matrix.shape[0]), dtype=np.int64)) @ matrix
+
+
+def sparse_arrays(prefix, matrix):
+    return {f'{prefix}.data': matrix.data, f'{prefix}.indices': matrix.indices, f'{prefix}.indptr': matrix.indptr}
+
+
+def sparse_from(arrays, prefix, shape):
+    return sp.csr_matrix((arrays[f'{prefix}.data'], arrays[f'{prefix}.indices'], arrays[f'{prefix}.indptr']), shape=shape)
+
+
+class Analytics:
+    def __init__(self, n_features=N_FEATURES):
+        from sklearn.feature_extraction import FeatureHasher
+
+        self.n_features = n_features
+        self.analyzer = make_vectorizer().build_analyzer()
+        self.hasher = FeatureHasher(n_features=n_features, input_type='string', alternate_sign=False, dtype=np.int32)
+        # Occurrences of every term seen, its feature, and the term naming each
+        # feature: on a collision, the most frequent one
+        self.occurrences = {}
+        self.new_occurrences = {}
+        self.features = {}
+        self.terms = {}
+        # Column of every feature seen, and the feature of every column
+        self.columns = {}
+        self.column_features = []
+        # One slot per row version ever added; replaced and removed ones are dead
+        self.slots = pd.DataFrame({column: pd.Series(dtype=object) for column in SLOT_COLUMNS})
+        self.digests = np.empty(0, dtype=np.uint64)
+        self.alive = np.empty(0, dtype=bool)
+        self.matrix = sp.csr_matrix((0, 0), dtype=np.int32)
+        # Aggregates over live slots
+        self.labels = {column: [] for column in GROUP_COLUMNS}
+        self.label_ids = {column: {} for column in GROUP_COLUMNS}
+        self.sums = {column: sp.csr_matrix((0, 0), dtype=np.int64) for column in GROUP_COLUMNS}
+        self.sizes = {column: np.zeros(0, dtype=np.int64) for column in GROUP_COLUMNS}
+        self.totals = sp.csr_matrix((1, 0), dtype=np.int64)
+        self.cube = CountCube(np.zeros([1] * len(DIMENSIONS), dtype=np.int64), {dim: [] for dim in DIMENSIONS})
+        # Slot of every row of the last synced frame, for masks
+        self.order = None
+        # Slots and chunks already on disk
+        self.saved = 0
+        self.chunks = 0
+
+    def live_slots(self):
+        # Slot of every live Link
+        live = np.flatnonzero(self.alive)
+        return pd.Series(live, index=pd.Index(self.slots['Link'].to_numpy()[live]))
+
+    def encode(self, column, values):
+        # Group ids of `values`, registering new labels; -1 where missing
+        ids = self.label_ids[column]
+        for value in pd.unique(values.dropna().astype(object)):
+            if value not in ids:
+                ids[value] = len(ids)
+                self.labels[column].append(value)
+        return values.astype(object).map(ids).fillna(-1).to_numpy(np.intp)
+
+    def grown(self, matrix, n_rows=None):
+        # `matrix` padded with empty rows to `n_rows` and with empty columns to
+        # one per feature seen
+        n_rows = matrix.shape[0] if n_rows is None else n_rows
+        indptr = np.pad(matrix.indptr, (0, n_rows - matrix.shape[0]), mode='edge')
+        return sp.csr_matrix((matrix.data, matrix.indices, indptr), shape=(n_rows, len(self.columns)))
+
+    def vectorize(self, pitches):
+        with span('incremental.vectorize'):
+            tokens = [self.analyzer(pitch) for pitch in pitches.fillna('')]
+            hashed = self.hasher.transform(tokens)
+        self.count_terms(Counter(chain.from_iterable(tokens)))
+        # Hashed features to columns, appending one per feature not seen before
+        features, inverse = np.unique(hashed.indices, return_inverse=True)
+        for feature in features.tolist():
+            if feature not in self.columns:
+                self.columns[feature] = len(self.columns)
+                self.column_features.append(feature)
+        columns = np.array([self.columns[feature] for feature in features.tolist()], dtype=np.int32)
+        matrix = sp.csr_matrix((hashed.data, columns[inverse.ravel()], hashed.indptr), shape=(hashed.shape[0], len(self.columns)))
+        matrix.sort_indices()
+        return matrix
+
+    def count_terms(self, counts):
+        new = sorted(set(counts).difference(self.features))
+        if new:
+            # Each single-term row has exactly one nonzero, in its term's feature
+            self.features.update(zip(new, self.hasher.transform([[term] for term in new]).indices.tolist()))
+        for term, count in counts.items():
+            self.occurrences[term] = self.occurrences.get(term, 0) + count
+            self.new_occurrences[term] = self.new_occurrences.get(term, 0) + count
+            feature = self.features[term]
+            name = self.terms.get(feature, term)
+            if (-self.occurrences[term], term) <= (-self.occurrences[name], name):
+                self.terms[feature] = term
+
+    def accumulate(self, rows, matrix, sign):
+        # Counts the rows, with their term counts `matrix`, in (sign 1) or out (-1)
+        for column in GROUP_COLUMNS:
+            codes = self.encode(column, rows[column])
+            n_groups = len(self.labels[column])
+            sums, sizes = group_sums(matrix, codes, n_groups)
+            self.sums[column] = self.grown(self.sums[column], n_groups) + sign * self.grown(sums.astype(np.int64))
+            self.sizes[column] = np.pad(self.sizes[column], (0, n_groups - len(self.sizes[column]))) + sign * sizes
+        self.totals = self.grown(self.totals) + sign * self.grown(column_sums(matrix))
+        self.cube = self.cube.merged(**{'added' if sign > 0 else 'removed': rows})
+
+    def update(self, delta, removed=()):
+        # Upserts the rows of `delta` by Link and drops the rows of the `removed` links
+        delta = delta.drop_duplicates('Link', keep='last')
+        live = self.live_slots()
+        stale = live.reindex(pd.Index(delta['Link']).append(pd.Index(removed))).dropna().to_numpy(np.intp)
+        if len(stale):
+            self.accumulate(self.slots.iloc[stale], self.matrix[stale], -1)
+            self.alive[stale] = False
+        if len(delta):
+            rows = delta[SLOT_COLUMNS].astype(object).reset_index(drop=True)
+            matrix = self.vectorize(delta['Pitch'])
+            self.accumulate(rows, matrix, 1)
+            self.slots = pd.concat([self.slots, rows], ignore_index=True)
+            self.digests = np.concatenate([self.digests, row_digests(delta)])
+            self.alive = np.concatenate([self.alive, np.ones(len(delta), dtype=bool)])
+            self.matrix = sp.vstack([self.grown(self.matrix), matrix], format='csr')
+        self.order = None
+        incr('incremental.rows_added', len(delta))
+        incr('incremental.rows_removed', len(stale))
+
+    def sync(self, startups_data):
+        # Brings the state up to date with `startups_data`; returns the number of
+        # rows added, changed or removed
+        with span('incremental.diff'):
+            digests = row_digests(startups_data)
+            live = self.live_slots()
+            links = pd.Index(startups_data['Link'])
+            positions = live.index.get_indexer(links)
+            changed = positions < 0
+            changed[~changed] = self.digests[live.to_numpy()[positions[~changed]]] != digests[~changed]
+            removed = live.index.difference(links)
+        if changed.any() or len(removed):
+            self.update(startups_data[changed], removed)
+        self.order = self.live_slots().reindex(links).to_numpy(np.intp)
+        return int(changed.sum()) + len(removed)
+
+    def group(self, column, value):
+        group = self.label_ids[column].get(value)
+        return self.sums[column][group] if group is not None else sp.csr_matrix((1, len(self.columns)), dtype=np.int64)
+
+    def term_counts(self, country=None, category=None, mask=None):
+        # Sparse 1 x columns counts, read from the aggregates unless both
+        # filters or a mask (over the last synced frame) are given
+        if mask is None and country is None and category is None:
+            return self.totals
+        if mask is None and (country is None or category is None):
+            return self.group('Country', country) if country is not None else self.group('Category', category)
+        if mask is not None and self.order is None:
+            raise ValueError('a mask needs a synced frame')
+        slots = self.order[np.asarray(mask)] if mask is not None else np.flatnonzero(self.alive)
+        for column, value in (('Country', country), ('Category', category)):
+            if value is not None:
+                slots = slots[self.slots[column].to_numpy()[slots] == value]
+        return column_sums(self.matrix[slots])
+
+    def top_words(self, n=20, country=None, category=None, mask=None):
+        # Same frame as TermIndex.top_words(), ties broken alphabetically
+        counts = self.term_counts(country, category, mask).tocsr()
+        keep = counts.data > 0
+        columns, values = counts.indices[keep], counts.data[keep]
+        words = np.asarray([self.terms[self.column_features[column]] for column in columns], dtype=object)
+        top = np.lexsort((words, -values))[:n]
+        return pd.DataFrame({'Word': words[top], 'Frequency': values[top]})
+
+    def compact(self):
+        # Drops dead slots so that the state is saved again as a single chunk;
+        # the synced frame's rows keep pointing at their (renumbered) slots
+        live = np.flatnonzero(self.alive)
+        if self.order is not None:
+            self.order = (np.cumsum(self.alive) - 1)[self.order]
+        self.slots = self.slots.iloc[live].reset_index(drop=True)
+        self.digests = self.digests[live]
+        self.alive = self.alive[live]
+        self.matrix = self.matrix[live]
+        self.new_occurrences = dict(self.occurrences)
+        self.saved = self.chunks = 0
+
+    def save(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        if self.chunks >= MAX_CHUNKS:
+            self.compact()
+        if self.saved < len(self.slots):
+            # New slots go to a chunk of their own; earlier chunks never change
+            base = os.path.join(directory, f'chunk-{self.chunks:05d}')
+            sp.save_npz(base + '.npz', self.matrix[self.saved:])
+            np.save(base + '-digests.npy', self.digests[self.saved:])
+            self.slots.iloc[self.saved:].to_parquet(base + '.parquet', index=False)
+            with open(base + '.json', 'w', encoding='utf-8') as f:
+                json.dump({'occurrences': self.new_occurrences}, f)
+            self.new_occurrences = {}
+            self.saved = len(self.slots)
+            self.chunks += 1
+        # The snapshot names the chunks it covers, so it is written last, atomically
+        meta = {
+            'format': STATE_FORMAT, 'n_features': self.n_features, 'chunks': self.chunks,
+            'labels': self.labels, 'cube_labels': self.cube.labels,
+        }
+        arrays = {
+            'meta': np.array(json.dumps(meta)), 'alive': self.alive, 'cube': self.cube.counts,
+            'columns': np.array(self.column_features, dtype=np.int64),
+        }
+        arrays.update(sparse_arrays('totals', self.totals))
+        for column in GROUP_COLUMNS:
+            arrays.update(sparse_arrays(f'sums.{column}', self.sums[column]))
+            arrays[f'sizes.{column}'] = self.sizes[column]
+        tmp_path = os.path.join(directory, f'state.{threading.get_ident()}.tmp.npz')
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, os.path.join(directory, 'state.npz'))
+        # Chunks left over from before a compaction
+        for path in glob.glob(os.path.join(directory, 'chunk-*')):
+            if int(os.path.basename(path)[6:11]) >= self.chunks:
+                os.remove(path)
+
+    @classmethod
+    def load(cls, directory):
+        with np.load(os.path.join(directory, 'state.npz')) as arrays:
+            arrays = dict(arrays)
+        meta = json.loads(str(arrays['meta']))
+        if meta['format'] != STATE_FORMAT:
+            raise ValueError(f"state format {meta['format']} is not {STATE_FORMAT}")
+        state = cls(meta['n_features'])
+        state.column_features = arrays['columns'].tolist()
+        state.columns = {feature: column for column, feature in enumerate(state.column_features)}
+        matrices, slots, digests = [], [], []
+        for chunk in range(meta['chunks']):
+            base = os.path.join(directory, f'chunk-{chunk:05d}')
+            matrices.append(state.grown(sp.load_npz(base + '.npz')))
+            digests.append(np.load(base + '-digests.npy'))
+            slots.append(pd.read_parquet(base + '.parquet').astype(object))
+            with open(base + '.json', encoding='utf-8') as f:
+                state.count_terms(json.load(f)['occurrences'])
+        if matrices:
+            state.matrix = sp.vstack(matrices, format='csr')
+            state.slots = pd.concat(slots, ignore_index=True)
+            state.digests = np.concatenate(digests)
+        state.new_occurrences = {}
+        state.alive = arrays['alive']
+        if len(state.alive) != len(state.slots):
+            raise ValueError('state does not match its chunks')
+        state.labels = meta['labels']
+        state.label_ids = {column: {label: i for i, label in enumerate(labels)} for column, labels in state.labels.items()}
+        state.totals = sparse_from(arrays, 'totals', (1, len(state.columns)))
+        for column in GROUP_COLUMNS:
+            state.sizes[column] = arrays[f'sizes.{column}']
+            state.sums[column] = sparse_from(arrays, f'sums.{column}', (len(state.labels[column]), len(state.columns)))
+        state.cube = CountCube(arrays['cube'], meta['cube_labels'])
+        state.saved, state.chunks = len(state.slots), meta['chunks']
+        return state
+
+
+def state_key(paths=None, **filters):
+    # Names the sources a state follows; unlike dataset_version() it stays the
+    # same when their content changes
+    sources = [os.path.abspath(path) for path in as_paths(paths)]
+    scope = {column: as_values(values) for column, values in sorted(filters.items()) if values is not None}
+    return hashlib.sha256(json.dumps([sources, scope]).encode('utf-8')).hexdigest()[:16]
+
+
+_states = {}
+_lock = threading.Lock()
+
+
+def load_analytics(startups_data=None, key=None):
+    # The persisted state for `key` synced with `startups_data` (by default the
+    # current dataset), and saved again if anything changed
+    key = key or state_key()
+    directory = os.path.join(CACHE_DIR, key)
+    with _lock:
+        if key not in _states:
+            try:
+                state = Analytics.load(directory)
+                incr('incremental.cache_hits')
+            except (OSError, ValueError, KeyError):
+                incr('incremental.cache_misses')
+                state = Analytics()
+            _states.clear()
+            _states[key] = state
+        state = _states[key]
+        with span('incremental.sync'):
+            changed = state.sync(startups_data if startups_data is not None else load_startups())
+        if changed:
+            with span('incremental.save'):
+                state.save(directory)
+    return state
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Bring the incremental keyword and aggregate state up to date with the dataset.')
+    parser.add_argument('paths', nargs='*', help='dataset sources (default: the store or the bundled CSV)')
+    parser.add_argument('--top', type=int, default=10, help='top words to print')
+    args = parser.parse_args()
+
+    startups_data = load_startups(args.paths or None)
+    started = time.perf_counter()
+    key = state_key(args.paths or None)
+    state = load_analytics(startups_data, key)
+    print(f'Synced {len(startups_data)} startups into {os.path.join(CACHE_DIR, key)} in {time.perf_counter() - started:.2f}s')
+    print(state.top_words(args.top).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
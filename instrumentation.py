@@ -0,0 +1,237 @@
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from functools import wraps
+
+# Lightweight timing spans and counters for the hot paths (fetching, parsing,
+# loading, vectorizing, rendering). Disabled by default: span() then hands back a
+# shared no-op object and incr() returns at once, so instrumented code pays
+# about one function call. Enable with enable() or the WEBSUMMIT_METRICS
+# environment variable, e.g. WEBSUMMIT_METRICS=log,json:metrics.json,prom:metrics.prom
+# A Trace additionally collects the spans of one thread (e.g. one dashboard rerun)
+# even while metrics are globally disabled.
+
+logger = logging.getLogger('websummit.metrics')
+
+_enabled = False
+_exporters = []
+_lock = threading.Lock()
+_spans = {}
+_counters = {}
+_local = threading.local()
+
+
+class _NoopSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NOOP = _NoopSpan()
+
+
+class _Span:
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record_span(self.name, time.perf_counter() - self.start)
+        return False
+
+
+def span(name):
+    if _enabled or getattr(_local, 'trace', None) is not None:
+        return _Span(name)
+    return NOOP
+
+
+def timed(name):
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_span(name, seconds):
+    trace = getattr(_local, 'trace', None)
+    if trace is not None:
+        trace.spans.append((name, seconds))
+    if not _enabled:
+        return
+    with _lock:
+        stats = _spans.get(name)
+        if stats is None:
+            _spans[name] = [1, seconds, seconds]
+        else:
+            stats[0] += 1
+            stats[1] += seconds
+            stats[2] = max(stats[2], seconds)
+
+
+def incr(name, value=1):
+    trace = getattr(_local, 'trace', None)
+    if trace is not None:
+        trace.counters[name] = trace.counters.get(name, 0) + value
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def snapshot():
+    with _lock:
+        return {
+            'spans': {name: {'count': count, 'total_seconds': total, 'max_seconds': peak} for name, (count, total, peak) in _spans.items()},
+            'counters': dict(_counters),
+        }
+
+
+def reset():
+    with _lock:
+        _spans.clear()
+        _counters.clear()
+
+
+class Trace:
+    # Spans and counters of the current thread between start() and stop()
+    def __init__(self):
+        self.spans = []
+        self.counters = {}
+        self.seconds = 0.0
+
+    def start(self):
+        self.started = time.perf_counter()
+        _local.trace = self
+        return self
+
+    def stop(self):
+        _local.trace = None
+        self.seconds = time.perf_counter() - self.started
+        return self
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+    def totals(self):
+        # Per span name: number of calls and total seconds, slowest first
+        totals = {}
+        for name, seconds in self.spans:
+            count, total = totals.get(name, (0, 0.0))
+            totals[name] = (count + 1, total + seconds)
+        return sorted(totals.items(), key=lambda item: -item[1][1])
+
+
+class LogExporter:
+    def __init__(self):
+        # Visible even when the application never configured logging
+        if not logger.handlers:
+            logger.addHandler(logging.StreamHandler())
+            logger.setLevel(logging.INFO)
+
+    def export(self, data):
+        for name, stats in sorted(data['spans'].items()):
+            logger.info('span %s count=%d total=%.6fs max=%.6fs', name, stats['count'], stats['total_seconds'], stats['max_seconds'])
+        for name, value in sorted(data['counters'].items()):
+            logger.info('counter %s=%s', name, value)
+
+
+class JsonExporter:
+    def __init__(self, path):
+        self.path = path
+
+    def export(self, data):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+
+
+def label_value(value):
+    # Escaping of Prometheus label values: backslash, double quote and newline
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class PrometheusExporter:
+    # Text exposition format, for node_exporter's textfile collector
+    def __init__(self, path, prefix='websummit'):
+        self.path = path
+        self.prefix = prefix
+
+    def export(self, data):
+        # Each metric family is one group: its TYPE line, then all its samples
+        spans = sorted(data['spans'].items())
+        families = [
+            ('span_seconds_total', 'counter', 'span', [(name, f"{stats['total_seconds']:.6f}") for name, stats in spans]),
+            ('span_calls_total', 'counter', 'span', [(name, stats['count']) for name, stats in spans]),
+            ('span_max_seconds', 'gauge', 'span', [(name, f"{stats['max_seconds']:.6f}") for name, stats in spans]),
+            ('events_total', 'counter', 'name', sorted(data['counters'].items())),
+        ]
+        lines = []
+        for family, kind, label, samples in families:
+            lines.append(f'# TYPE {self.prefix}_{family} {kind}')
+            for name, value in samples:
+                lines.append(f'{self.prefix}_{family}{{{label}="{label_value(name)}"}} {value}')
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        os.replace(tmp_path, self.path)
+
+
+def parse_exporters(spec):
+    exporters = []
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        kind, _, path = item.partition(':')
+        if kind == 'log':
+            exporters.append(LogExporter())
+        elif kind == 'json':
+            exporters.append(JsonExporter(path or 'metrics.json'))
+        elif kind == 'prom':
+            exporters.append(PrometheusExporter(path or 'metrics.prom'))
+        else:
+            raise ValueError(f"Unknown metrics exporter '{kind}', expected log, json or prom")
+    return exporters
+
+
+def enable(exporters=()):
+    global _enabled
+    _exporters.extend(exporters)
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+    _exporters.clear()
+
+
+def export():
+    data = snapshot()
+    for exporter in _exporters:
+        exporter.export(data)
+    return data
+
+
+@atexit.register
+def _export_at_exit():
+    if _enabled and _exporters:
+        export()
+
+
+if os.environ.get('WEBSUMMIT_METRICS'):
+    enable(parse_exporters(os.environ['WEBSUMMIT_METRICS']))
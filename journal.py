@@ -0,0 +1,86 @@
+import json
+import os
+import threading
+
+# Append-only checkpoint of scraped records, one JSON line per detail page.
+# Run markers let a crashed crawl resume: records written by a run that never
+# reached its 'complete' marker are reused as-is without touching the network.
+# Records from finished runs are kept as the baseline for change detection.
+
+
+class CrawlJournal:
+    def __init__(self, path='.cache/journal.jsonl'):
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.run = 0
+        self.resuming = False
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        started = completed = None
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    item = json.loads(line)
+                except ValueError:
+                    # A crash mid-write leaves a truncated last line
+                    continue
+                if 'start' in item:
+                    started = item['start']
+                elif 'complete' in item:
+                    completed = item['complete']
+                else:
+                    self.entries[item['url']] = item
+        if started is None:
+            # No run marker survived (a journal compacted without them): every
+            # record comes from a finished run
+            started = completed = max((entry['run'] for entry in self.entries.values()), default=0)
+        self.run = started
+        self.resuming = started > (completed or 0)
+
+    def begin(self):
+        if not self.resuming:
+            self.run += 1
+            self._compact()
+        self.file = open(self.path, 'a', encoding='utf-8')
+        self._write({'start': self.run})
+
+    def _compact(self):
+        # Start each fresh run from one line per URL instead of the full history.
+        # The markers of the last finished run are kept, so that a crash before
+        # this run's own 'start' is written still loads as a finished journal.
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'start': self.run - 1}) + '\n')
+            f.write(json.dumps({'complete': self.run - 1}) + '\n')
+            for entry in self.entries.values():
+                f.write(json.dumps(entry) + '\n')
+        os.replace(tmp_path, self.path)
+
+    def _write(self, item):
+        with self.lock:
+            self.file.write(json.dumps(item) + '\n')
+            self.file.flush()
+
+    def resumable(self, url):
+        entry = self.entries.get(url)
+        if self.resuming and entry is not None and entry['run'] == self.run:
+            return entry
+        return None
+
+    def previous(self, url):
+        return self.entries.get(url)
+
+    def record(self, url, digest, record):
+        entry = {'url': url, 'digest': digest, 'run': self.run, 'record': record}
+        self.entries[url] = entry
+        self._write(entry)
+
+    def finish(self):
+        self._write({'complete': self.run})
+        self.file.close()
+        self.resuming = False
@@ -0,0 +1,159 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from dataset import CACHE_ROOT, data_version, load_startups
+from instrumentation import incr, span
+
+# The pitch corpus tokenized once into a sparse document-term matrix, one row per
+# startup in dataset order. Keyword counts for any subset are a row slice plus a
+# column sum, instead of refitting a CountVectorizer for every slice.
+
+CACHE_DIR = os.path.join(CACHE_ROOT, 'terms')
+GROUP_COLUMNS = ['Country', 'Category']
+
+
+def make_vectorizer(**kwargs):
+    # Same tokenization as the per-slice CountVectorizer the scripts used to fit;
+    # sklearn is imported on first use, it dominates the module's import time
+    from sklearn.feature_extraction.text import CountVectorizer
+
+    return CountVectorizer(stop_words='english', **kwargs)
+
+
+def column_sums(matrix):
+    return np.asarray(matrix.sum(axis=0)).ravel()
+
+
+def group_sums(matrix, codes, n_groups):
+    # Sparse indicator (groups x docs) times the document-term matrix; rows with a
+    # negative code (missing label) belong to no group.
+    rows = np.flatnonzero(codes >= 0)
+    indicator = sp.csr_matrix(
+        (np.ones(len(rows), dtype=matrix.dtype), (codes[rows], rows)),
+        shape=(n_groups, matrix.shape[0]),
+    )
+    return indicator @ matrix, np.bincount(codes[rows], minlength=n_groups)
+
+
+def group_means(matrix, codes, n_groups):
+    # Per-group mean of every column, still sparse; empty groups stay all-zero.
+    # Sums are divided by the group size (not scaled by its inverse) so that the
+    # means are bit-for-bit those of a dense groupby().mean().
+    sums, sizes = group_sums(matrix, codes, n_groups)
+    means = sp.csr_matrix(sums, dtype=float)
+    means.data /= np.repeat(np.maximum(sizes, 1), np.diff(means.indptr))
+    return means, sizes
+
+
+class TermIndex:
+    def __init__(self, matrix, vocabulary, codes, labels):
+        self.matrix = matrix.tocsr()
+        self.vocabulary = np.asarray(vocabulary, dtype=object)
+        self.term_ids = {term: i for i, term in enumerate(self.vocabulary)}
+        # Per grouping column: integer code per row and the label of each code
+        self.codes = codes
+        self.labels = labels
+        self._groups = {}
+
+    @classmethod
+    def build(cls, startups_data):
+        vectorizer = make_vectorizer(dtype=np.int32)
+        with span('keywords.vectorize'):
+            matrix = vectorizer.fit_transform(startups_data['Pitch'].fillna(''))
+        codes, labels = {}, {}
+        for column in GROUP_COLUMNS:
+            values = startups_data[column].astype('category')
+            codes[column] = values.cat.codes.to_numpy()
+            labels[column] = list(values.cat.categories)
+        return cls(matrix, vectorizer.get_feature_names_out(), codes, labels)
+
+    def save(self, base):
+        os.makedirs(os.path.dirname(base), exist_ok=True)
+        sp.save_npz(base + '.npz', self.matrix)
+        np.savez(base + '-codes.npz', **self.codes)
+        with open(base + '.json', 'w', encoding='utf-8') as f:
+            json.dump({'vocabulary': self.vocabulary.tolist(), 'labels': self.labels}, f)
+
+    @classmethod
+    def load(cls, base):
+        matrix = sp.load_npz(base + '.npz')
+        with np.load(base + '-codes.npz') as data:
+            codes = {column: data[column] for column in data.files}
+        with open(base + '.json', encoding='utf-8') as f:
+            meta = json.load(f)
+        return cls(matrix, meta['vocabulary'], codes, meta['labels'])
+
+    def group_rows(self, column):
+        # Row positions of every label in `column`, built on first use
+        if column not in self._groups:
+            codes = self.codes[column]
+            order = np.argsort(codes, kind='stable')
+            bounds = np.searchsorted(codes[order], np.arange(len(self.labels[column]) + 1))
+            self._groups[column] = {
+                label: order[bounds[i]:bounds[i + 1]] for i, label in enumerate(self.labels[column])
+            }
+        return self._groups[column]
+
+    def rows(self, country=None, category=None, mask=None):
+        selected = None
+        for column, value in (('Country', country), ('Category', category)):
+            if value is None:
+                continue
+            group = self.group_rows(column).get(value, np.empty(0, dtype=np.intp))
+            selected = group if selected is None else np.intersect1d(selected, group)
+        if mask is not None:
+            masked = np.flatnonzero(np.asarray(mask))
+            selected = masked if selected is None else np.intersect1d(selected, masked)
+        return selected
+
+    def term_counts(self, country=None, category=None, mask=None):
+        rows = self.rows(country, category, mask)
+        return column_sums(self.matrix if rows is None else self.matrix[rows])
+
+    def top_words(self, n=20, country=None, category=None, mask=None):
+        counts = self.term_counts(country, category, mask)
+        # Ties are broken alphabetically, since the vocabulary is sorted
+        top = np.argsort(-counts, kind='stable')[:n]
+        top = top[counts[top] > 0]
+        return pd.DataFrame({'Word': self.vocabulary[top], 'Frequency': counts[top]})
+
+    def group_means(self, column, terms=None, mask=None):
+        # Average count of each term per label of `column`, as a labels x terms
+        # frame; only the selected columns are ever densified.
+        rows = self.rows(mask=mask)
+        matrix = self.matrix if rows is None else self.matrix[rows]
+        codes = self.codes[column] if rows is None else self.codes[column][rows]
+        if terms is not None:
+            matrix = matrix[:, [self.term_ids[term] for term in terms]]
+        means, sizes = group_means(matrix, codes, len(self.labels[column]))
+        present = np.flatnonzero(sizes)
+        return pd.DataFrame(
+            means[present].toarray(),
+            index=pd.Index(np.asarray(self.labels[column], dtype=object)[present], name=column),
+            columns=list(terms) if terms is not None else self.vocabulary,
+        )
+
+
+_indexes = {}
+
+
+def load_term_index(startups_data=None, version=None):
+    # Memoized per dataset version (or per frame, see data_version), and
+    # persisted under .cache/terms
+    version = data_version(startups_data, version)
+    if version not in _indexes:
+        base = os.path.join(CACHE_DIR, version[:16])
+        try:
+            index = TermIndex.load(base)
+            incr('keywords.cache_hits')
+        except (OSError, ValueError, KeyError):
+            incr('keywords.cache_misses')
+            index = TermIndex.build(startups_data if startups_data is not None else load_startups())
+            index.save(base)
+        _indexes.clear()
+        _indexes[version] = index
+    return _indexes[version]
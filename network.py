@@ -0,0 +1,143 @@
+import hashlib
+import json
+import os
+
+import networkx as nx
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.linalg import eigsh
+
+from dataset import CACHE_ROOT
+from instrumentation import incr, span
+
+# Graph construction and layout for the relation analyses. Layouts are seeded and
+# persisted by graph structure, so the same graph is laid out once and always
+# drawn the same way.
+
+CACHE_DIR = os.path.join(CACHE_ROOT, 'layouts')
+DEFAULT_SEED = 42
+# Above this many nodes 'auto' switches from spring to spectral layout
+SPRING_LIMIT = 500
+
+
+def category_country_graph(startups_data):
+    counts = startups_data.groupby(['Category', 'Country'], observed=True).size()
+    counts = counts[counts > 0]
+    graph = nx.Graph()
+    graph.add_nodes_from(counts.index.get_level_values('Category').unique(), kind='category')
+    graph.add_nodes_from(counts.index.get_level_values('Country').unique(), kind='country')
+    graph.add_weighted_edges_from(zip(
+        counts.index.get_level_values('Category'),
+        counts.index.get_level_values('Country'),
+        counts.to_numpy().tolist(),
+    ))
+    return graph
+
+
+def add_similarity_edges(graph, startups, sources, targets, similarities):
+    # Startup nodes keyed by row position, joined by pitch similarity (see
+    # similarity.SimilarityIndex.top_k_pairs) and labelled with their name.
+    rows = np.unique(np.concatenate([sources, targets]))
+    names = startups['Startup Name'].to_numpy()
+    graph.add_nodes_from((('startup', int(row)), {'kind': 'startup', 'label': names[row]}) for row in rows)
+    graph.add_weighted_edges_from(zip(
+        (('startup', int(row)) for row in sources),
+        (('startup', int(row)) for row in targets),
+        similarities.tolist(),
+    ))
+    return graph
+
+
+def graph_key(graph, engine, **params):
+    digest = hashlib.sha256()
+    digest.update(json.dumps([engine, sorted(params.items())], default=str).encode('utf-8'))
+    digest.update(json.dumps(sorted(map(str, graph.nodes))).encode('utf-8'))
+    edges = sorted((*sorted((str(u), str(v))), data.get('weight', 1)) for u, v, data in graph.edges(data=True))
+    digest.update(json.dumps(edges, default=str).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def component_positions(graph):
+    # Laplacian eigenmap of a connected graph: the leading non-trivial
+    # eigenvectors of the normalized adjacency matrix (the smallest of the
+    # normalized Laplacian), scaled by D^-1/2. Asking eigsh for the largest
+    # eigenvalues of a shifted matrix converges quickly even for tens of thousands
+    # of nodes, where networkx's own spectral_layout is far slower.
+    nodes = list(graph)
+    if len(nodes) < 4:
+        return nx.circular_layout(graph)
+    adjacency = nx.to_scipy_sparse_array(graph, nodelist=nodes, weight='weight', dtype=float, format='csr')
+    degrees = np.asarray(adjacency.sum(axis=1)).ravel()
+    scale = sp.diags(1.0 / np.sqrt(np.where(degrees > 0, degrees, 1.0)))
+    shifted = scale @ adjacency @ scale + sp.identity(len(nodes))
+    if len(nodes) <= 100:
+        vectors = np.linalg.eigh(shifted.toarray())[1][:, -3:]
+    else:
+        v0 = np.random.default_rng(DEFAULT_SEED).random(len(nodes))
+        vectors = eigsh(shifted, k=3, which='LA', tol=1e-3, v0=v0)[1]
+    coords = scale @ vectors[:, :2]
+    coords = coords - coords.mean(axis=0)
+    coords /= np.abs(coords).max() or 1.0
+    return dict(zip(nodes, coords))
+
+
+def pack_components(layouts):
+    # Lays the components' [-1, 1] layouts out in rows of square cells, largest
+    # first, each cell's side proportional to the square root of its node count
+    sizes = [np.sqrt(len(pos)) for pos in layouts]
+    width = max(max(sizes), np.sqrt(sum(size * size for size in sizes)) * 1.2)
+    packed, x, y, row_height = {}, 0.0, 0.0, 0.0
+    for pos, size in zip(layouts, sizes):
+        if x > 0 and x + size > width:
+            x, y, row_height = 0.0, y - row_height, 0.0
+        for node, (px, py) in pos.items():
+            # 10% of each cell is left as a margin between components
+            packed[node] = np.array([x + size * (0.5 + 0.45 * px), y - size * (0.5 - 0.45 * py)])
+        x += size
+        row_height = max(row_height, size)
+    coords = np.array(list(packed.values()))
+    center = (coords.max(axis=0) + coords.min(axis=0)) / 2
+    extent = np.abs(coords - center).max() or 1.0
+    return {node: (xy - center) / extent for node, xy in packed.items()}
+
+
+def spectral_positions(graph):
+    # Eigenvectors only spread out a connected graph (on a disconnected one the
+    # leading ones merely tell components apart), so each connected component is
+    # laid out on its own and the components are packed side by side
+    components = sorted(nx.connected_components(graph), key=lambda nodes: (-len(nodes), sorted(map(str, nodes))))
+    if len(components) == 1:
+        return component_positions(graph)
+    return pack_components([component_positions(graph.subgraph(nodes)) for nodes in components])
+
+
+def compute_layout(graph, engine='auto', seed=DEFAULT_SEED, k=0.5):
+    if engine == 'auto':
+        engine = 'spring' if graph.number_of_nodes() <= SPRING_LIMIT else 'spectral'
+    if engine == 'spring':
+        return nx.spring_layout(graph, k=k, seed=seed)
+    if engine == 'spectral':
+        return spectral_positions(graph)
+    if engine == 'bipartite':
+        # One column per node kind, e.g. categories on the left, countries on the right
+        first = [node for node, kind in graph.nodes(data='kind') if kind == 'category']
+        return nx.bipartite_layout(graph, first or list(graph)[:1])
+    raise ValueError(f"Unknown layout engine '{engine}', expected auto, spring, spectral or bipartite")
+
+
+def layout(graph, engine='auto', seed=DEFAULT_SEED, k=0.5):
+    path = os.path.join(CACHE_DIR, graph_key(graph, engine, seed=seed, k=k) + '.json')
+    try:
+        with open(path, encoding='utf-8') as f:
+            positions = json.load(f)
+        pos = {node: np.array(positions[str(node)]) for node in graph.nodes}
+        incr('layout.cache_hits')
+        return pos
+    except (OSError, ValueError, KeyError):
+        pass
+    with span('layout.compute'):
+        pos = compute_layout(graph, engine, seed, k)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({str(node): [float(x), float(y)] for node, (x, y) in pos.items()}, f)
+    return pos
@@ -0,0 +1,283 @@
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+from instrumentation import span
+from schema import key_social_links
+
+# Interchangeable HTML parsing backends for the listing and detail pages. Every
+# backend returns exactly the same records; they only differ in speed and in which
+# optional libraries they need. Selectors are compiled once per backend. Text
+# follows BeautifulSoup's get_text(strip=True): comments and the contents of
+# <script>, <style> and <template> are left out, and an empty document is just a
+# page without records.
+
+LISTING_ITEM = 'ListItemStyles__StyledListItemWrapper-sc-94ce60d2-2'
+LISTING_CATEGORY = 'ListItemStyles__ItemDescription-sc-94ce60d2-5'
+COUNTRY_TAG = 'ContentTagList__ContentTagListItem-sc-6e6a07b7-1'
+COUNTRY_TEXT = 'bodyCopy__P-sc-986c63f9-1'
+SOCIAL_BUTTONS = 'SocialButton__SocialButtonWrapper-sc-29e85cc1-0'
+PITCH_BLOCK = 'ProfileDetails__ProfileDetailsContent-sc-8beaea78-1'
+
+LISTING_SELECTOR = f'figure.{LISTING_ITEM}'
+CATEGORY_SELECTOR = f'span.{LISTING_CATEGORY}'
+COUNTRY_SELECTOR = f'a.{COUNTRY_TAG} .{COUNTRY_TEXT}'
+SOCIAL_SELECTOR = f'div.{SOCIAL_BUTTONS} a'
+PITCH_SELECTOR = f'div.{PITCH_BLOCK}'
+
+HIDDEN_TAGS = ['script', 'style', 'template']
+
+
+def listing_record(name, href, category):
+    # Items without a link to a detail page are skipped
+    if not href:
+        return None
+    return name, href, category if category is not None else 'N/A'
+
+
+def details_record(country, hrefs, pitch):
+    # Buttons without an href (share, copy link) are not social links
+    return country if country is not None else 'N/A', key_social_links(hrefs), pitch if pitch is not None else 'N/A'
+
+
+class SoupParser:
+    # BeautifulSoup with soupsieve selectors compiled up front
+    def __init__(self, builder='html.parser'):
+        import soupsieve
+        from bs4 import BeautifulSoup
+
+        self.BeautifulSoup = BeautifulSoup
+        self.builder = builder
+        self.listing = soupsieve.compile(LISTING_SELECTOR)
+        self.anchor = soupsieve.compile('a')
+        self.category = soupsieve.compile(CATEGORY_SELECTOR)
+        self.country = soupsieve.compile(COUNTRY_SELECTOR)
+        self.social = soupsieve.compile(SOCIAL_SELECTOR)
+        self.pitch = soupsieve.compile(PITCH_SELECTOR)
+
+    def parse_listing(self, html):
+        soup = self.BeautifulSoup(html, self.builder)
+        startups = []
+        for startup in self.listing.select(soup):
+            anchor = self.anchor.select_one(startup)
+            category = self.category.select_one(startup)
+            record = listing_record(
+                anchor.get_text(strip=True) if anchor else None,
+                anchor.get('href') if anchor else None,
+                category.get_text(strip=True) if category else None,
+            )
+            if record is not None:
+                startups.append(record)
+        return startups
+
+    def parse_details(self, html):
+        soup = self.BeautifulSoup(html, self.builder)
+        country = self.country.select_one(soup)
+        pitch = self.pitch.select_one(soup)
+        return details_record(
+            country.get_text(strip=True) if country else None,
+            [link.get('href') for link in self.social.select(soup)],
+            pitch.get_text(strip=True) if pitch else None,
+        )
+
+
+def class_xpath(tag, class_name):
+    return f"{tag}[contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')]"
+
+
+class LxmlParser:
+    # lxml.html tree with the CSS selectors hand-translated to pre-compiled XPath
+    def __init__(self):
+        import lxml.html
+        from lxml import etree
+
+        self.fromstring = lxml.html.fromstring
+        self.ParserError = etree.ParserError
+        self.listing = etree.XPath('//' + class_xpath('figure', LISTING_ITEM))
+        self.anchor = etree.XPath('.//a')
+        self.category = etree.XPath('.//' + class_xpath('span', LISTING_CATEGORY))
+        self.country = etree.XPath('//' + class_xpath('a', COUNTRY_TAG) + '//' + class_xpath('*', COUNTRY_TEXT))
+        self.social = etree.XPath('//' + class_xpath('div', SOCIAL_BUTTONS) + '//a')
+        self.pitch = etree.XPath('//' + class_xpath('div', PITCH_BLOCK))
+        self.texts = etree.XPath('descendant::text()[not({})]'.format(' or '.join(f'ancestor::{tag}' for tag in HIDDEN_TAGS)))
+
+    def tree(self, html):
+        # lxml refuses documents without any element
+        try:
+            return self.fromstring(html)
+        except self.ParserError:
+            return self.fromstring('<html></html>')
+
+    def text(self, element):
+        # Same as BeautifulSoup's get_text(strip=True)
+        return ''.join(piece.strip() for piece in self.texts(element))
+
+    def parse_listing(self, html):
+        startups = []
+        for startup in self.listing(self.tree(html)):
+            anchor = self.anchor(startup)
+            category = self.category(startup)
+            record = listing_record(
+                self.text(anchor[0]) if anchor else None,
+                anchor[0].get('href') if anchor else None,
+                self.text(category[0]) if category else None,
+            )
+            if record is not None:
+                startups.append(record)
+        return startups
+
+    def parse_details(self, html):
+        root = self.tree(html)
+        country = self.country(root)
+        pitch = self.pitch(root)
+        return details_record(
+            self.text(country[0]) if country else None,
+            [link.get('href') for link in self.social(root)],
+            self.text(pitch[0]) if pitch else None,
+        )
+
+
+class SelectolaxParser:
+    # Lexbor engine from selectolax; fastest, but an optional dependency
+    def __init__(self):
+        from selectolax.lexbor import LexborHTMLParser
+
+        self.HTMLParser = LexborHTMLParser
+
+    def tree(self, html):
+        tree = self.HTMLParser(html)
+        tree.strip_tags(HIDDEN_TAGS)
+        return tree
+
+    def text(self, node):
+        return node.text(deep=True, separator='', strip=True)
+
+    def parse_listing(self, html):
+        startups = []
+        for startup in self.tree(html).css(LISTING_SELECTOR):
+            anchor = startup.css_first('a')
+            category = startup.css_first(CATEGORY_SELECTOR)
+            record = listing_record(
+                self.text(anchor) if anchor is not None else None,
+                anchor.attributes.get('href') if anchor is not None else None,
+                self.text(category) if category is not None else None,
+            )
+            if record is not None:
+                startups.append(record)
+        return startups
+
+    def parse_details(self, html):
+        tree = self.tree(html)
+        country = tree.css_first(COUNTRY_SELECTOR)
+        pitch = tree.css_first(PITCH_SELECTOR)
+        return details_record(
+            self.text(country) if country is not None else None,
+            [link.attributes.get('href') for link in tree.css(SOCIAL_SELECTOR)],
+            self.text(pitch) if pitch is not None else None,
+        )
+
+
+BACKENDS = {
+    'html.parser': lambda: SoupParser('html.parser'),
+    'bs4-lxml': lambda: SoupParser('lxml'),
+    'lxml': LxmlParser,
+    'selectolax': SelectolaxParser,
+}
+
+DEFAULT_BACKEND = 'html.parser'
+
+
+@lru_cache(maxsize=None)
+def get_parser(backend=DEFAULT_BACKEND):
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown parser backend '{backend}', expected one of {', '.join(BACKENDS)}")
+    return BACKENDS[backend]()
+
+
+def available_backends():
+    backends = []
+    for backend in BACKENDS:
+        try:
+            get_parser(backend)
+        except ImportError:
+            continue
+        backends.append(backend)
+    return backends
+
+
+def parse_listing(html, backend=DEFAULT_BACKEND):
+    with span('parse.listing'):
+        return get_parser(backend).parse_listing(html)
+
+
+def parse_details(html, backend=DEFAULT_BACKEND):
+    with span('parse.details'):
+        return get_parser(backend).parse_details(html)
+
+
+class ParsePool:
+    # Parses detail pages in worker processes so CPU-bound parsing is not
+    # serialized behind the GIL of the fetching threads.
+    def __init__(self, backend=DEFAULT_BACKEND, workers=None):
+        self.backend = backend
+        self.executor = ProcessPoolExecutor(max_workers=workers)
+
+    def __call__(self, html):
+        return self.executor.submit(parse_details, html, self.backend).result()
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+
+def fixture_pages(filename):
+    import fixtures
+
+    rows = fixtures.load_rows(filename)
+    listings = [fixtures.render_listing_page(rows, page) for page in range(1, len(rows) // fixtures.PAGE_SIZE + 2)]
+    details = [fixtures.render_detail_page(row) for row in rows]
+    return listings, details
+
+
+def check_equivalence(listings, details, backends):
+    # Raises if any backend disagrees with the first one on any page
+    reference = backends[0]
+    for html in listings:
+        expected = parse_listing(html, reference)
+        for backend in backends[1:]:
+            if parse_listing(html, backend) != expected:
+                raise AssertionError(f"'{backend}' and '{reference}' disagree on a listing page")
+    for html in details:
+        expected = parse_details(html, reference)
+        for backend in backends[1:]:
+            if parse_details(html, backend) != expected:
+                raise AssertionError(f"'{backend}' and '{reference}' disagree on a detail page")
+
+
+def benchmark(details, backend, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for html in details:
+            parse_details(html, backend)
+        best = min(best, time.perf_counter() - start)
+    return len(details) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check that parser backends agree and compare their speed.')
+    parser.add_argument('--fixtures', default='websummit_startups_2024.csv', help='CSV used to render fixture pages')
+    parser.add_argument('--backend', action='append', choices=sorted(BACKENDS), help='backend to include (default: all installed)')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    backends = args.backend or available_backends()
+    listings, details = fixture_pages(args.fixtures)
+    check_equivalence(listings, details, backends)
+    print(f'{len(backends)} backends produce identical records for {len(listings)} listing and {len(details)} detail pages')
+    for backend in backends:
+        print(f'{backend:>12}: {benchmark(details, backend, args.repeat):8.0f} pages/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,131 +1,195 @@
-import pandas as pd
-from sklearn.feature_extraction.text import CountVectorizer
-import matplotlib.pyplot as plt
-import seaborn as sns
-from wordcloud import WordCloud
-import networkx as nx
+import argparse
+
+from cube import load_cube
+from dataset import load_startups
+
+# Each analysis is a function of the dataset and imports the plotting, text and
+# graph libraries it needs when it runs, so importing this module (or running
+# a single section) does not pay for all of them.
+
+
+def barplot(values, labels, title, xlabel, ylabel):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    plt.figure(figsize=(10, 6))
+    sns.barplot(x=values, y=labels, palette='viridis')
+    plt.title(title)
+    plt.xlabel(xlabel)
+    plt.ylabel(ylabel)
+    plt.show()
+
+
+def show_wordcloud(image, title):
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=(10, 6))
+    plt.imshow(image, interpolation='bilinear')
+    plt.title(title)
+    plt.axis('off')
+    plt.show()
 
-# Load the dataset
-file_path = 'websummit_startups_2024.csv'
-startups_data = pd.read_csv(file_path)
 
 # 1. Analyze collaborations: Country vs Category
-category_country_pivot = startups_data.pivot_table(index='Category', columns='Country', aggfunc='size', fill_value=0)
+def collaboration_heatmap(startups_data):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    category_country_pivot = load_cube(startups_data).pivot('Category', 'Country')
+
+    # Heatmap for collaborations
+    plt.figure(figsize=(12, 8))
+    sns.heatmap(category_country_pivot, cmap='viridis', annot=True, fmt='d', cbar_kws={'label': 'Number of Startups'})
+    plt.title('Heatmap of Startups by Category and Country')
+    plt.xlabel('Country')
+    plt.ylabel('Category')
+    plt.show()
 
-# Heatmap for collaborations
-plt.figure(figsize=(12, 8))
-sns.heatmap(category_country_pivot, cmap='viridis', annot=True, fmt='d', cbar_kws={'label': 'Number of Startups'})
-plt.title('Heatmap of Startups by Category and Country')
-plt.xlabel('Country')
-plt.ylabel('Category')
-plt.show()
 
 # 2. Correlation between category and keywords in pitches
-vectorizer = CountVectorizer(stop_words='english', max_features=20)
-clean_pitches = startups_data['Pitch'].dropna()
-
-word_counts = vectorizer.fit_transform(clean_pitches)
-words_df = pd.DataFrame(word_counts.toarray(), columns=vectorizer.get_feature_names_out())
-words_df['Category'] = startups_data.loc[clean_pitches.index, 'Category']
-
-# Average frequency of each word per category
-words_by_category = words_df.groupby('Category').mean().transpose()
-plt.figure(figsize=(12, 6))
-sns.heatmap(words_by_category, cmap='coolwarm', annot=True, fmt='.2f', cbar_kws={'label': 'Average Frequency'})
-plt.title('Keyword Frequency by Category')
-plt.xlabel('Category')
-plt.ylabel('Word')
-plt.show()
+def keywords_by_category(startups_data):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    from keywords import load_term_index
+
+    term_index = load_term_index(startups_data)
+    top_words = sorted(term_index.top_words(20)['Word'])
+
+    # Average frequency of each word per category, over startups with a pitch
+    words_by_category = term_index.group_means('Category', top_words, mask=startups_data['Pitch'].notna()).transpose()
+    plt.figure(figsize=(12, 6))
+    sns.heatmap(words_by_category, cmap='coolwarm', annot=True, fmt='.2f', cbar_kws={'label': 'Average Frequency'})
+    plt.title('Keyword Frequency by Category')
+    plt.xlabel('Category')
+    plt.ylabel('Word')
+    plt.show()
+
 
 # 3. Visualize relationships between countries and categories using a network graph
-category_country_counts = startups_data.groupby(['Category', 'Country']).size().reset_index(name='Count')
-graph = nx.Graph()
-
-for _, row in category_country_counts.iterrows():
-    graph.add_edge(row['Category'], row['Country'], weight=row['Count'])
-
-# Draw the graph
-plt.figure(figsize=(12, 8))
-pos = nx.spring_layout(graph, k=0.5)
-edges = graph.edges(data=True)
-weights = [edge[2]['weight'] for edge in edges]
-nx.draw_networkx(graph, pos, with_labels=True, edge_color=weights, edge_cmap=plt.cm.viridis, node_size=700, font_size=10)
-sm = plt.cm.ScalarMappable(cmap=plt.cm.viridis, norm=plt.Normalize(vmin=min(weights), vmax=max(weights)))
-sm.set_array([])
-plt.colorbar(sm, label='Number of Startups')
-plt.title('Network of Countries and Categories')
-plt.show()
+def category_country_network(startups_data):
+    import matplotlib.pyplot as plt
+    import networkx as nx
+    from network import category_country_graph, layout
+
+    graph = category_country_graph(startups_data)
+
+    # Draw the graph
+    plt.figure(figsize=(12, 8))
+    pos = layout(graph)
+    edges = graph.edges(data=True)
+    weights = [edge[2]['weight'] for edge in edges]
+    nx.draw_networkx(graph, pos, with_labels=True, edge_color=weights, edge_cmap=plt.cm.viridis, node_size=700, font_size=10)
+    sm = plt.cm.ScalarMappable(cmap=plt.cm.viridis, norm=plt.Normalize(vmin=min(weights), vmax=max(weights)))
+    sm.set_array([])
+    plt.colorbar(sm, ax=plt.gca(), label='Number of Startups')
+    plt.title('Network of Countries and Categories')
+    plt.show()
+
 
 # 4. Trends by region: Compare top keywords in pitches for each region
-def analyze_keywords_by_country(country_name):
-    country_pitches = startups_data[startups_data['Country'] == country_name]['Pitch'].dropna()
-    word_counts = vectorizer.fit_transform(country_pitches)
-    common_words = pd.DataFrame({
-        'Word': vectorizer.get_feature_names_out(),
-        'Frequency': word_counts.toarray().sum(axis=0)
-    }).sort_values(by='Frequency', ascending=False)
-    return common_words
-
-# Example: Analyze for Switzerland
-swiss_words = analyze_keywords_by_country('Switzerland')
-print(swiss_words.head(10))
-
-# Plot keyword frequencies for Switzerland
-plt.figure(figsize=(10, 6))
-sns.barplot(x=swiss_words['Frequency'], y=swiss_words['Word'], palette='viridis')
-plt.title('Top Keywords in Swiss Startups Pitches')
-plt.xlabel('Frequency')
-plt.ylabel('Word')
-plt.show()
-
-# Example: Analyze for Portugal
-portuguese_words = analyze_keywords_by_country('Portugal')
-print(portuguese_words.head(10))
-
-# Plot keyword frequencies for Portugal
-plt.figure(figsize=(10, 6))
-sns.barplot(x=portuguese_words['Frequency'], y=portuguese_words['Word'], palette='viridis')
-plt.title('Top Keywords in Portuguese Startups Pitches')
-plt.xlabel('Frequency')
-plt.ylabel('Word')
-plt.show()
+def analyze_keywords_by_country(startups_data, country_name):
+    from keywords import load_term_index
+
+    return load_term_index(startups_data).top_words(20, country=country_name)
+
+
+def regional_keywords(startups_data):
+    # Example: Analyze for Switzerland
+    swiss_words = analyze_keywords_by_country(startups_data, 'Switzerland')
+    print(swiss_words.head(10))
+
+    # Plot keyword frequencies for Switzerland
+    barplot(swiss_words['Frequency'], swiss_words['Word'], 'Top Keywords in Swiss Startups Pitches', 'Frequency', 'Word')
+
+    # Example: Analyze for Portugal
+    portuguese_words = analyze_keywords_by_country(startups_data, 'Portugal')
+    print(portuguese_words.head(10))
+
+    # Plot keyword frequencies for Portugal
+    barplot(portuguese_words['Frequency'], portuguese_words['Word'], 'Top Keywords in Portuguese Startups Pitches', 'Frequency', 'Word')
+
 
 # 5. Word cloud comparison for all startups
-all_wordcloud = WordCloud(width=800, height=400, background_color='white').generate(' '.join(clean_pitches))
-plt.figure(figsize=(10, 6))
-plt.imshow(all_wordcloud, interpolation='bilinear')
-plt.title('Word Cloud for All Startups')
-plt.axis('off')
-plt.show()
+def all_startups_wordcloud(startups_data):
+    import wordclouds
+    from keywords import load_term_index
 
+    show_wordcloud(wordclouds.render(wordclouds.frequencies(load_term_index(startups_data))), 'Word Cloud for All Startups')
 
 
 # 6. Analyze potential collaborations
-# Identify categories with high potential for collaboration
-collaboration_potential = category_country_pivot.sum(axis=1).sort_values(ascending=False)
-plt.figure(figsize=(10, 6))
-sns.barplot(x=collaboration_potential.values, y=collaboration_potential.index, palette='viridis')
-plt.title('Potential for Collaboration by Category')
-plt.xlabel('Number of Startups')
-plt.ylabel('Category')
-plt.show()
+def collaboration_potential(startups_data):
+    # Identify categories with high potential for collaboration
+    collaboration_potential = load_cube(startups_data).marginal('Category')
+    barplot(collaboration_potential.values, collaboration_potential.index, 'Potential for Collaboration by Category', 'Number of Startups', 'Category')
+
 
 # 7. Emerging categories
-# Identify categories with fewer startups but high growth potential
-emerging_categories = category_country_pivot.sum(axis=1).sort_values().head(10)
-plt.figure(figsize=(10, 6))
-sns.barplot(x=emerging_categories.values, y=emerging_categories.index, palette='viridis')
-plt.title('Emerging Categories with High Growth Potential')
-plt.xlabel('Number of Startups')
-plt.ylabel('Category')
-plt.show()
+def emerging_categories(startups_data):
+    # Identify categories with fewer startups but high growth potential
+    emerging_categories = load_cube(startups_data).emerging(10)
+    barplot(emerging_categories.values, emerging_categories.index, 'Emerging Categories with High Growth Potential', 'Number of Startups', 'Category')
+
 
 # 8. Focus on Web3 startups
-web3_startups = startups_data[startups_data['Category'].str.contains('Web3', case=False, na=False)]
-web3_pitches = web3_startups['Pitch'].dropna()
-web3_wordcloud = WordCloud(width=800, height=400, background_color='white').generate(' '.join(web3_pitches))
-plt.figure(figsize=(10, 6))
-plt.imshow(web3_wordcloud, interpolation='bilinear')
-plt.title('Word Cloud for Web3 Startups')
-plt.axis('off')
-plt.show()
\ No newline at end of file
+def web3_wordcloud(startups_data):
+    import wordclouds
+    from keywords import load_term_index
+
+    web3_mask = startups_data['Category'].str.contains('Web3', case=False, na=False)
+    show_wordcloud(wordclouds.render(wordclouds.frequencies(load_term_index(startups_data), mask=web3_mask)), 'Word Cloud for Web3 Startups')
+
+
+# 9. Find collaborators: startups with the most similar pitches
+def collaborators(startups_data):
+    import matplotlib.pyplot as plt
+    import networkx as nx
+    from network import add_similarity_edges, layout
+    from similarity import load_similarity_index
+
+    similarity_index = load_similarity_index(startups_data)
+    print(similarity_index.query('1Fit', k=10))
+
+    # Nearest-neighbour graph of all startups, coloured by category
+    sources, targets, similarities = similarity_index.top_k_pairs(k=5, min_similarity=0.2)
+    similarity_graph = add_similarity_edges(nx.Graph(), similarity_index.startups, sources, targets, similarities)
+    print(f'Similarity graph: {similarity_graph.number_of_nodes()} startups, {similarity_graph.number_of_edges()} links')
+    categories = similarity_index.startups['Category'].astype(str).to_numpy()
+    palette = {category: i for i, category in enumerate(sorted(set(categories)))}
+    node_colors = [palette[categories[row]] for _, row in similarity_graph.nodes]
+    weights = [edge[2]['weight'] for edge in similarity_graph.edges(data=True)]
+    plt.figure(figsize=(12, 12))
+    pos = layout(similarity_graph)
+    nx.draw_networkx_edges(similarity_graph, pos, edge_color=weights, edge_cmap=plt.cm.Greys, alpha=0.5)
+    nx.draw_networkx_nodes(similarity_graph, pos, node_color=node_colors, cmap=plt.cm.tab20, node_size=20)
+    plt.title('Startups with Similar Pitches')
+    plt.axis('off')
+    plt.show()
+
+
+SECTIONS = {
+    'collaboration_heatmap': collaboration_heatmap,
+    'keywords_by_category': keywords_by_category,
+    'category_country_network': category_country_network,
+    'regional_keywords': regional_keywords,
+    'all_startups_wordcloud': all_startups_wordcloud,
+    'collaboration_potential': collaboration_potential,
+    'emerging_categories': emerging_categories,
+    'web3_wordcloud': web3_wordcloud,
+    'collaborators': collaborators,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Relations between countries, categories, keywords and startups.')
+    parser.add_argument('--section', action='append', choices=list(SECTIONS), help='section to run, repeatable (default: all)')
+    args = parser.parse_args()
+
+    # Load the dataset
+    startups_data = load_startups()
+    for name in args.section or SECTIONS:
+        SECTIONS[name](startups_data)
+
+
+if __name__ == '__main__':
+    main()
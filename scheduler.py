@@ -0,0 +1,181 @@
+import heapq
+import itertools
+import json
+import threading
+import time
+from concurrent.futures import Future
+from email.utils import parsedate_to_datetime
+
+# Scheduling for the crawler: a thread pool that runs queued work by priority,
+# and an AIMD controller that adapts the number of requests in flight to what
+# the server tolerates. Concurrency grows by one per round of successful
+# requests and halves on throttling or server errors; Retry-After pauses new
+# requests altogether. The crawl targets a single host, so both are global.
+
+# Lower runs first: listing pages feed the queue, retries wait for everything else
+LISTING, DETAIL, RETRY = 0, 1, 2
+# Longest Retry-After honoured, in seconds
+MAX_RETRY_AFTER = 60.0
+
+
+def parse_retry_after(value, now=None):
+    # Seconds to wait from a Retry-After header (delta-seconds or HTTP date)
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - (now or time.time())
+        except (TypeError, ValueError):
+            return None
+    return min(max(seconds, 0.0), MAX_RETRY_AFTER)
+
+
+class PriorityExecutor:
+    # ThreadPoolExecutor-like pool whose queue is ordered by priority, then FIFO
+    def __init__(self, max_workers):
+        self.queue = []
+        self.counter = itertools.count()
+        self.condition = threading.Condition()
+        self.closed = False
+        self.threads = [threading.Thread(target=self._work, daemon=True) for _ in range(max_workers)]
+        for thread in self.threads:
+            thread.start()
+
+    def submit(self, fn, *args, priority=DETAIL, **kwargs):
+        future = Future()
+        with self.condition:
+            if self.closed:
+                raise RuntimeError('cannot schedule new work after shutdown')
+            heapq.heappush(self.queue, (priority, next(self.counter), future, fn, args, kwargs))
+            self.condition.notify()
+        return future
+
+    def _work(self):
+        while True:
+            with self.condition:
+                while not self.queue and not self.closed:
+                    self.condition.wait()
+                if not self.queue:
+                    return
+                _, _, future, fn, args, kwargs = heapq.heappop(self.queue)
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        # With cancel_futures, queued work is dropped; only running tasks finish
+        with self.condition:
+            self.closed = True
+            if cancel_futures:
+                while self.queue:
+                    heapq.heappop(self.queue)[2].cancel()
+            self.condition.notify_all()
+        if wait:
+            for thread in self.threads:
+                thread.join()
+
+
+class AdaptiveConcurrency:
+    # Additive increase, multiplicative decrease of the in-flight request limit.
+    # Only requests started after the last decrease can trigger another one, so
+    # a burst of 429s from the same overloaded moment halves the limit once.
+    def __init__(self, initial=8, minimum=1, maximum=32, adaptive=True):
+        self.limit = float(max(minimum, min(initial, maximum)))
+        self.minimum = minimum
+        self.maximum = maximum
+        self.adaptive = adaptive
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.decreased_at = 0.0
+        self.condition = threading.Condition()
+        self.stats = {'ok': 0, 'throttled': 0, 'error': 0, 'decreases': 0, 'paused_seconds': 0.0, 'peak_limit': self.limit}
+
+    def acquire(self):
+        with self.condition:
+            while True:
+                delay = self.paused_until - time.monotonic()
+                if delay <= 0 and self.in_flight < int(self.limit):
+                    break
+                self.condition.wait(delay if delay > 0 else None)
+            self.in_flight += 1
+            return time.monotonic()
+
+    def release(self, started, outcome, retry_after=None):
+        # outcome is 'ok', 'throttled' (429/503) or 'error' (other 5xx, timeouts)
+        with self.condition:
+            self.in_flight -= 1
+            self.stats[outcome] += 1
+            now = time.monotonic()
+            if retry_after:
+                until = now + retry_after
+                if until > self.paused_until:
+                    self.stats['paused_seconds'] += until - max(now, self.paused_until)
+                    self.paused_until = until
+            if self.adaptive:
+                if outcome == 'ok':
+                    self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+                    self.stats['peak_limit'] = max(self.stats['peak_limit'], self.limit)
+                elif started >= self.decreased_at:
+                    self.limit = max(self.minimum, self.limit / 2)
+                    self.decreased_at = now
+                    self.stats['decreases'] += 1
+            self.condition.notify_all()
+
+
+class CrawlReport:
+    # What a crawl fetched, what it had to retry and what it finally could not get
+    def __init__(self):
+        self.started = time.monotonic()
+        self.seconds = 0.0
+        self.pages = 0
+        self.records = 0
+        self.quarantined = []
+        self.recovered = []
+        self.failed = []
+        self.http = {}
+
+    def finish(self, control=None):
+        self.seconds = time.monotonic() - self.started
+        if control is not None:
+            self.http = dict(control.stats, final_limit=control.limit)
+        return self
+
+    @property
+    def complete(self):
+        return not self.failed
+
+    def as_dict(self):
+        return {
+            'seconds': self.seconds,
+            'pages': self.pages,
+            'records': self.records,
+            'records_per_second': self.records / self.seconds if self.seconds else 0.0,
+            'quarantined': self.quarantined,
+            'recovered': self.recovered,
+            'failed': self.failed,
+            'http': self.http,
+        }
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.as_dict(), f, indent=2)
+
+    def summary(self):
+        lines = [
+            f'Crawled {self.pages} listing pages and {self.records} startups in {self.seconds:.1f}s '
+            f'({self.records / self.seconds if self.seconds else 0.0:.1f}/s)',
+            f'Quarantined {len(self.quarantined)} URLs, recovered {len(self.recovered)}, failed {len(self.failed)}',
+        ]
+        if self.http:
+            lines.append(
+                f"HTTP: {self.http['ok']} ok, {self.http['throttled']} throttled, {self.http['error']} errors; "
+                f"concurrency peaked at {self.http['peak_limit']:.1f}, ended at {self.http['final_limit']:.1f} "
+                f"after {self.http['decreases']} decreases; paused {self.http['paused_seconds']:.1f}s for Retry-After"
+            )
+        lines.extend(f'  failed: {url}' for url in self.failed)
+        return '\n'.join(lines)
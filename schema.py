@@ -0,0 +1,99 @@
+import ast
+import json
+import re
+from urllib.parse import urlsplit
+
+COLUMNS = ['Startup Name', 'Link', 'Country', 'Category', 'Social Links', 'Pitch']
+
+# Appearance links look like /appearances/lis24/<id>/<slug>: event code, then edition year
+EVENT_PATTERN = re.compile(r'/appearances/([^/]+)/')
+YEAR_PATTERN = re.compile(r'(\d{2})$')
+
+# Known social networks by domain; the last link outside them is the startup's
+# own website, and any other (angel.co, wellfound.com, ...) is keyed by its host
+SOCIAL_DOMAINS = {
+    'linkedin.com': 'linkedin',
+    'crunchbase.com': 'crunchbase',
+    'instagram.com': 'instagram',
+    'x.com': 'x',
+    'twitter.com': 'x',
+    'facebook.com': 'facebook',
+    'youtube.com': 'youtube',
+    'tiktok.com': 'tiktok',
+    'github.com': 'github',
+}
+
+# Column holding each platform's link once social links are flattened
+SOCIAL_COLUMNS = {
+    'linkedin': 'LinkedIn',
+    'crunchbase': 'Crunchbase',
+    'instagram': 'Instagram',
+    'x': 'X',
+    'facebook': 'Facebook',
+    'youtube': 'YouTube',
+    'tiktok': 'TikTok',
+    'github': 'GitHub',
+    'website': 'Website',
+}
+
+
+def link_event(link):
+    match = EVENT_PATTERN.search(link) if isinstance(link, str) else None
+    return match.group(1) if match else None
+
+
+def event_year(event):
+    match = YEAR_PATTERN.search(event) if isinstance(event, str) else None
+    return 2000 + int(match.group(1)) if match else None
+
+
+def link_host(url):
+    host = urlsplit(url).netloc.lower()
+    return host[4:] if host.startswith('www.') else host
+
+
+def social_platform(url):
+    host = link_host(url)
+    for domain, platform in SOCIAL_DOMAINS.items():
+        if host == domain or host.endswith('.' + domain):
+            return platform
+    return 'website'
+
+
+def key_social_links(urls):
+    # Every distinct link, in order, keyed by platform (see SOCIAL_DOMAINS); a key
+    # already taken, e.g. by a second LinkedIn page, gets a numeric suffix
+    urls = list(dict.fromkeys(url for url in urls if url))
+    platforms = [social_platform(url) for url in urls]
+    website = max((i for i, platform in enumerate(platforms) if platform == 'website'), default=None)
+    links = {}
+    for i, (url, platform) in enumerate(zip(urls, platforms)):
+        key = base = platform if platform != 'website' or i == website else link_host(url) or 'link'
+        suffix = 1
+        while key in links:
+            suffix += 1
+            key = f'{base}-{suffix}'
+        links[key] = url
+    return links
+
+
+def normalize_social_links(links):
+    # Re-key links by platform; older scrapes keyed them by a fragment of the URL
+    return key_social_links(links.values())
+
+
+def parse_social_links(value):
+    # Accepts the JSON written by the CSV sink and the Python repr of older CSVs,
+    # as well as the object a JSON Lines file holds and the map (a list of key,
+    # value pairs) read back from Parquet
+    if isinstance(value, dict):
+        return normalize_social_links(value)
+    if isinstance(value, (list, tuple)):
+        return normalize_social_links(dict(list(value)))
+    if not isinstance(value, str) or not value:
+        return {}
+    try:
+        links = json.loads(value)
+    except ValueError:
+        links = ast.literal_eval(value)
+    return normalize_social_links(links)
@@ -1,80 +1,251 @@
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from functools import partial
+from urllib.parse import urljoin
+
 import requests
-from bs4 import BeautifulSoup
-import pandas as pd
 
-def fetch_webpage(url):
+import parsers
+from crawler import Fetcher
+from httpcache import HttpCache
+from instrumentation import incr
+from journal import CrawlJournal
+from scheduler import DETAIL, LISTING, RETRY, CrawlReport
+from schema import normalize_social_links
+from sinks import SINKS, CsvSink, open_sink
+
+BASE_URL = 'https://websummit.com/startups/featured-startups/page/'
+
+def fetch_webpage(url, fetcher=None):
+    if fetcher is not None:
+        return fetcher.get(url)
     response = requests.get(url)
     response.raise_for_status()
     return response.text
 
-def parse_html(html):
-    soup = BeautifulSoup(html, 'html.parser')
-    startups = []
-    
-    # Find all startup names, links, and categories
-    for startup in soup.select('figure.ListItemStyles__StyledListItemWrapper-sc-94ce60d2-2'):
-        name = startup.select_one('a').get_text(strip=True)
-        link = startup.select_one('a')['href']
-        category = startup.select_one('span.ListItemStyles__ItemDescription-sc-94ce60d2-5').get_text(strip=True)
-        startups.append((name, link, category))
-    
-    return startups
-
-def fetch_company_details(url):
-    html = fetch_webpage(url)
-    soup = BeautifulSoup(html, 'html.parser')
-    
-    # Extract country
-    country = soup.select_one('a.ContentTagList__ContentTagListItem-sc-6e6a07b7-1 .bodyCopy__P-sc-986c63f9-1')
-    country_text = country.get_text(strip=True) if country else 'N/A'
-    
-    # Extract social media links
-    social_links = {}
-    for link in soup.select('div.SocialButton__SocialButtonWrapper-sc-29e85cc1-0 a'):
-        platform = link['href'].split('.')[1]  # Extract platform name from URL
-        social_links[platform] = link['href']
-    
-    # Extract pitch
-    pitch = soup.select_one('div.ProfileDetails__ProfileDetailsContent-sc-8beaea78-1')
-    pitch_text = pitch.get_text(strip=True) if pitch else 'N/A'
-    
-    return country_text, social_links, pitch_text
+def parse_html(html, backend=parsers.DEFAULT_BACKEND):
+    return parsers.parse_listing(html, backend)
+
+def parse_company_details(html, backend=parsers.DEFAULT_BACKEND):
+    return parsers.parse_details(html, backend)
+
+def fetch_company_details(url, fetcher=None):
+    return parse_company_details(fetch_webpage(url, fetcher))
 
 def save_to_csv(data, filename):
-    df = pd.DataFrame(data, columns=['Startup Name', 'Link', 'Country', 'Category', 'Social Links', 'Pitch'])
-    df.to_csv(filename, index=False)
+    with CsvSink(filename) as sink:
+        for record in data:
+            sink.write(record)
 
-def main():
-    base_url = 'https://websummit.com/startups/featured-startups/page/'
-    page = 1
-    detailed_startups = []
-    
-    while page <= 20:
-        url = f'{base_url}{page}/'
+def restore_record(entry):
+    # Journal entries may predate platform-keyed social links
+    name, full_url, country, category, social_links, pitch = entry['record']
+    return name, full_url, country, category, normalize_social_links(social_links), pitch
+
+def fallback_record(name, full_url, category, journal=None):
+    # The last known record, or a placeholder for a page that was never fetched
+    previous = journal.previous(full_url) if journal is not None else None
+    if previous is not None:
+        return restore_record(previous)
+    return name, full_url, 'N/A', category, {}, 'N/A'
+
+def fetch_startup(name, full_url, category, fetcher, journal=None, parse_details=parse_company_details, fallback=True):
+    # Records from an interrupted run are reused without a request; otherwise the
+    # page is revalidated and only re-parsed when its content actually changed.
+    # Without `fallback`, fetch errors propagate instead of returning fallback_record().
+    previous = None
+    if journal is not None:
+        resumed = journal.resumable(full_url)
+        if resumed is not None:
+            incr('scrape.resumed')
+            return restore_record(resumed)
+        previous = journal.previous(full_url)
+
+    try:
+        page = fetcher.fetch(full_url)
+    except Exception as e:
+        if not fallback:
+            raise
+        print(f"Error fetching details for {name} at {full_url}: {e}")
+        incr('scrape.failed')
+        return fallback_record(name, full_url, category, journal)
+
+    if previous is not None and previous['digest'] == page.digest and previous['record'][0] == name and previous['record'][3] == category:
+        incr('scrape.unchanged')
+        record = restore_record(previous)
+    else:
+        country, social_links, pitch = parse_details(page.text)
+        record = (name, full_url, country, category, social_links, pitch)
+    if journal is not None:
+        journal.record(full_url, page.digest, list(record))
+    return record
+
+def crawl(fetcher, base_url=BASE_URL, max_pages=20, journal=None, backend=parsers.DEFAULT_BACKEND, parse_details=None, report=None, retry_passes=2, retry_delay=None):
+    # Listing pages are walked in order while detail pages are already
+    # downloading on the fetcher's pool, so both stages overlap; each listing
+    # page goes ahead of queued details so that the pool never runs dry. Records
+    # are yielded in listing order as soon as every earlier one is done. Pages
+    # still failing after the fetcher's own retries are quarantined and retried
+    # in up to `retry_passes` later passes at the lowest priority; their records
+    # come last. What fails every pass is saved as its last known record.
+    if parse_details is None:
+        parse_details = partial(parse_company_details, backend=backend)
+    if report is None:
+        report = CrawlReport()
+    if retry_delay is None:
+        retry_delay = fetcher.backoff * 2 ** fetcher.retries
+    quarantined_pages, quarantined_startups = [], []
+
+    def quarantine(url, e):
+        print(f"Quarantined {url}: {e}")
+        if url not in report.quarantined:
+            incr('scrape.quarantined')
+            report.quarantined.append(url)
+
+    def schedule(name, full_url, category, priority):
+        future = fetcher.submit(fetch_startup, name, full_url, category, fetcher, journal, parse_details, fallback=False, priority=priority)
+        return future, name, full_url, category
+
+    def fetch_listing(url, listing_priority, detail_priority):
+        # Detail tasks of the page's startups; None past the last page
         try:
-            html = fetch_webpage(url)
+            html = fetcher.submit(fetch_webpage, url, fetcher, priority=listing_priority).result()
+            startups = parse_html(html, backend)
         except requests.exceptions.HTTPError as e:
-            print(f"Error fetching page {page}: {e}")
-            break
-        
-        startups = parse_html(html)
-        
-        if not startups:
-            break
-        
-        for name, link, category in startups:
-            full_url = 'https://websummit.com' + link
-            try:
-                country, social_links, pitch = fetch_company_details(full_url)
-            except Exception as e:
-                print(f"Error fetching details for {name} at {full_url}: {e}")
-                country, social_links, pitch = 'N/A', {}, 'N/A'
-            detailed_startups.append((name, full_url, country, category, social_links, pitch))
-        
-        page += 1
-    
-    save_to_csv(detailed_startups, 'websummit_startups_2024.csv')
-    print(f'Successfully saved {len(detailed_startups)} startups to websummit_startups_2024.csv')
+            if e.response is not None and e.response.status_code == 404:
+                return None
+            quarantine(url, e)
+            quarantined_pages.append(url)
+            return []
+        except requests.exceptions.RequestException as e:
+            quarantine(url, e)
+            quarantined_pages.append(url)
+            return []
+        if url in report.quarantined:
+            report.recovered.append(url)
+        report.pages += 1
+        return [schedule(name, urljoin(base_url, link), category, detail_priority) for name, link, category in startups] or None
+
+    def settle(task):
+        future, name, full_url, category = task
+        try:
+            record = future.result()
+        except Exception as e:
+            quarantine(full_url, e)
+            quarantined_startups.append((name, full_url, category))
+            return None
+        if full_url in report.quarantined:
+            report.recovered.append(full_url)
+        report.records += 1
+        return record
+
+    pending = deque()
+    try:
+        page = 1
+        while page <= max_pages:
+            tasks = fetch_listing(f'{base_url}{page}/', LISTING, DETAIL)
+            if tasks is None:
+                break
+            pending.extend(tasks)
+
+            while pending and pending[0][0].done():
+                record = settle(pending.popleft())
+                if record is not None:
+                    yield record
+
+            page += 1
+
+        for _ in range(retry_passes):
+            while pending:
+                record = settle(pending.popleft())
+                if record is not None:
+                    yield record
+            if not quarantined_pages and not quarantined_startups:
+                break
+            # Give the server time to recover before the next pass
+            time.sleep(retry_delay)
+            pages, startups = quarantined_pages[:], quarantined_startups[:]
+            del quarantined_pages[:], quarantined_startups[:]
+            for url in pages:
+                pending.extend(fetch_listing(url, RETRY, RETRY) or [])
+            pending.extend(schedule(name, full_url, category, RETRY) for name, full_url, category in startups)
+
+        while pending:
+            record = settle(pending.popleft())
+            if record is not None:
+                yield record
+
+        report.failed.extend(quarantined_pages)
+        for name, full_url, category in quarantined_startups:
+            print(f"Failed {full_url}")
+            incr('scrape.failed')
+            report.failed.append(full_url)
+            report.records += 1
+            yield fallback_record(name, full_url, category, journal)
+        report.finish(fetcher.control)
+    except GeneratorExit:
+        # The consumer stopped early: drop the detail pages nobody will read
+        for future, *_ in pending:
+            future.cancel()
+        raise
+
+def main():
+    parser = argparse.ArgumentParser(description='Scrape the Web Summit featured startups.')
+    parser.add_argument('--base-url', default=BASE_URL)
+    parser.add_argument('--max-pages', type=int, default=20)
+    parser.add_argument('--concurrency', type=int, default=8, help='parallel HTTP requests to start with')
+    parser.add_argument('--max-concurrency', type=int, help='upper bound while adapting concurrency (default: 4x --concurrency)')
+    parser.add_argument('--fixed-concurrency', action='store_true', help='do not adapt concurrency to throttling and errors')
+    parser.add_argument('--rate', type=float, default=10.0, help='max requests per second per host (0 to disable)')
+    parser.add_argument('--retries', type=int, default=3)
+    parser.add_argument('--parser', default=parsers.DEFAULT_BACKEND, choices=sorted(parsers.BACKENDS), help='HTML parsing backend')
+    parser.add_argument('--parse-workers', type=int, default=0, help='parse detail pages in this many processes (0: parse on the fetch threads)')
+    parser.add_argument('--output', help='output file, or store directory (default: websummit_startups_2024.csv, or the store for --format partitioned)')
+    parser.add_argument('--format', choices=sorted(SINKS), help='output format (default: from the output extension)')
+    parser.add_argument('--cache-dir', default='.cache', help='HTTP cache and checkpoint journal location')
+    parser.add_argument('--no-cache', action='store_true', help='refetch everything and skip the journal')
+    parser.add_argument('--report', help='also write the crawl report to this JSON file')
+    args = parser.parse_args()
+    if args.output is None:
+        from dataset import STORE_DIR
+
+        args.output = STORE_DIR if args.format == 'partitioned' else 'websummit_startups_2024.csv'
+
+    cache = journal = None
+    if not args.no_cache:
+        cache = HttpCache(os.path.join(args.cache_dir, 'http'))
+        journal = CrawlJournal(os.path.join(args.cache_dir, 'journal.jsonl'))
+        if journal.resuming:
+            print(f'Resuming interrupted run {journal.run}')
+        journal.begin()
+
+    parse_pool = parsers.ParsePool(args.parser, args.parse_workers) if args.parse_workers else None
+    report = CrawlReport()
+    fetcher = Fetcher(
+        concurrency=args.concurrency, rate=args.rate, retries=args.retries, cache=cache,
+        adaptive=not args.fixed_concurrency, max_concurrency=args.max_concurrency,
+    )
+    with fetcher:
+        with open_sink(args.output, args.format) as sink:
+            for record in crawl(fetcher, args.base_url, args.max_pages, journal, args.parser, parse_pool, report):
+                sink.write(record)
+                incr('scrape.rows')
+    if parse_pool is not None:
+        parse_pool.close()
+
+    if journal is not None:
+        journal.finish()
+    status = 'updated' if sink.replaced else 'unchanged'
+    print(f'Saved {sink.count} startups to {args.output} ({status})')
+    print(report.summary())
+    if args.report:
+        report.save(args.report)
+    if report.failed:
+        # Placeholders or stale records were saved for these; make cron notice
+        sys.exit(1)
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,94 @@
+import re
+
+import numpy as np
+
+from dataset import data_version, load_startups
+from instrumentation import span
+from keywords import make_vectorizer
+
+# Inverted index over startup names and pitches for the dashboard's explorer.
+# Postings are the columns of a sparse CSC document-term matrix, so a search
+# touches only the postings of its query terms, never the pitches themselves.
+# Complete query words are tokenized like the pitches (stop words and single
+# characters dropped) and must match exactly; the last fragment, possibly still
+# being typed, matches as a prefix ("fin" finds fintech and finance) unless it
+# is a whole stop word. All terms must match.
+
+PAGE_SIZE = 25
+# The fragment at the end of a query, when it does not end in a separator
+FRAGMENT = re.compile(r'\w+$')
+
+
+class SearchIndex:
+    def __init__(self, matrix, vocabulary, codes, labels, analyzer, stop_words):
+        self.matrix = matrix.tocsc()
+        self.vocabulary = np.asarray(vocabulary, dtype=str)
+        self.codes = codes
+        self.labels = labels
+        self.analyzer = analyzer
+        self.stop_words = stop_words
+
+    @classmethod
+    def build(cls, startups_data):
+        vectorizer = make_vectorizer(binary=True, dtype=np.int8)
+        text = startups_data['Startup Name'].fillna('') + ' ' + startups_data['Pitch'].fillna('')
+        with span('search.build'):
+            matrix = vectorizer.fit_transform(text)
+        codes, labels = {}, {}
+        for column in ('Country', 'Category'):
+            values = startups_data[column].astype('category')
+            codes[column] = values.cat.codes.to_numpy()
+            labels[column] = list(values.cat.categories)
+        return cls(matrix, vectorizer.get_feature_names_out(), codes, labels, vectorizer.build_analyzer(), vectorizer.get_stop_words())
+
+    def postings(self, term, prefix=False):
+        # Rows containing `term`, or any term that starts with it
+        start = np.searchsorted(self.vocabulary, term)
+        stop = np.searchsorted(self.vocabulary, term + '￿' if prefix else term, side='right')
+        return np.unique(self.matrix.indices[self.matrix.indptr[start]:self.matrix.indptr[stop]])
+
+    def query_terms(self, text):
+        # (term, prefix) pairs of a query
+        text = (text or '').lower()
+        fragment = FRAGMENT.search(text)
+        terms = [(term, False) for term in self.analyzer(text[:fragment.start()] if fragment else text)]
+        if fragment and fragment.group() not in self.stop_words:
+            terms.append((fragment.group(), True))
+        return terms
+
+    def search(self, text='', country=None, category=None):
+        # Row positions, in dataset order, matching all terms and filters
+        rows = None
+        with span('search.query'):
+            for term, prefix in self.query_terms(text):
+                matches = self.postings(term, prefix)
+                rows = matches if rows is None else np.intersect1d(rows, matches, assume_unique=True)
+            for column, value in (('Country', country), ('Category', category)):
+                if value is None:
+                    continue
+                code = self.labels[column].index(value) if value in self.labels[column] else -2
+                matches = np.flatnonzero(self.codes[column] == code)
+                rows = matches if rows is None else np.intersect1d(rows, matches, assume_unique=True)
+        return np.arange(self.matrix.shape[0]) if rows is None else rows
+
+
+def page_count(n_rows, page_size=PAGE_SIZE):
+    return max(1, -(-n_rows // page_size))
+
+
+def page(rows, number, page_size=PAGE_SIZE):
+    # The row positions of 1-based page `number`
+    start = (number - 1) * page_size
+    return rows[start:start + page_size]
+
+
+_indexes = {}
+
+
+def load_search_index(startups_data=None, version=None):
+    # Memoized per dataset version (or per frame, see data_version)
+    version = data_version(startups_data, version)
+    if version not in _indexes:
+        _indexes.clear()
+        _indexes[version] = SearchIndex.build(startups_data if startups_data is not None else load_startups())
+    return _indexes[version]
@@ -0,0 +1,117 @@
+import numpy as np
+
+from dataset import data_version, load_startups
+from instrumentation import span, timed
+
+# Nearest-neighbour search over pitches. Each startup is an L2-normalized TF-IDF
+# row of a sparse matrix, so cosine similarity is a sparse dot product. All-pairs
+# queries are computed in row blocks and never hold the full N x N matrix.
+
+RESULT_COLUMNS = ['Startup Name', 'Country', 'Category']
+# Upper bound on the dense block of scores held at once by top_k_pairs (in cells)
+BLOCK_CELLS = 1 << 24
+
+
+def make_vectorizer(method):
+    from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer, TfidfVectorizer
+
+    if method == 'tfidf':
+        return TfidfVectorizer(stop_words='english', sublinear_tf=True, dtype=np.float32)
+    if method == 'hashed':
+        # Fixed-width hashed features: no vocabulary to fit or store, stable across datasets
+        hashing = HashingVectorizer(stop_words='english', alternate_sign=False, norm=None, n_features=1 << 20, dtype=np.float32)
+        return hashing, TfidfTransformer(sublinear_tf=True)
+    raise ValueError(f"Unknown vectorization method '{method}', expected tfidf or hashed")
+
+
+class SimilarityIndex:
+    def __init__(self, matrix, startups, vectorizer):
+        self.matrix = matrix.tocsr().astype(np.float32)
+        self.startups = startups.reset_index(drop=True)
+        self.vectorizer = vectorizer
+
+    @classmethod
+    def build(cls, startups_data, method='tfidf'):
+        pitches = startups_data['Pitch'].fillna('')
+        vectorizer = make_vectorizer(method)
+        with span('similarity.vectorize'):
+            if method == 'hashed':
+                hashing, transformer = vectorizer
+                matrix = transformer.fit_transform(hashing.transform(pitches))
+            else:
+                matrix = vectorizer.fit_transform(pitches)
+        return cls(matrix, startups_data[RESULT_COLUMNS], vectorizer)
+
+    def vectorize(self, text):
+        if isinstance(self.vectorizer, tuple):
+            hashing, transformer = self.vectorizer
+            return transformer.transform(hashing.transform([text]))
+        return self.vectorizer.transform([text])
+
+    def position(self, name):
+        matches = np.flatnonzero(self.startups['Startup Name'].to_numpy() == name)
+        if not len(matches):
+            raise KeyError(f"No startup named '{name}'")
+        return matches[0]
+
+    def scores(self, vector):
+        return np.asarray((self.matrix @ vector.T).todense()).ravel()
+
+    @timed('similarity.query')
+    def query(self, startup=None, text=None, k=10):
+        # Top-k startups most similar to a startup (by name or row) or to free text
+        if text is not None:
+            scores = self.scores(self.vectorize(text))
+            exclude = None
+        else:
+            exclude = self.position(startup) if isinstance(startup, str) else int(startup)
+            scores = self.scores(self.matrix[exclude])
+            scores[exclude] = 0.0
+        top = top_k(scores, k)
+        top = top[scores[top] > 0]
+        result = self.startups.iloc[top].copy()
+        result['Similarity'] = scores[top]
+        return result.reset_index(drop=True)
+
+    def top_k_pairs(self, k=5, min_similarity=0.0, block_size=None):
+        # For every startup its k nearest neighbours, as (source, target, score)
+        # arrays of row positions.
+        n = self.matrix.shape[0]
+        k = min(k, n - 1)
+        if k <= 0:
+            empty = np.empty(0, dtype=np.intp)
+            return empty, empty, np.empty(0, dtype=np.float32)
+        block_size = block_size or max(1, BLOCK_CELLS // n)
+        transposed = self.matrix.T.tocsc()
+        sources, targets, similarities = [], [], []
+        for start in range(0, n, block_size):
+            block = (self.matrix[start:start + block_size] @ transposed).toarray()
+            rows = np.arange(block.shape[0])
+            block[rows, rows + start] = 0.0
+            neighbours = np.argpartition(-block, k - 1, axis=1)[:, :k]
+            scores = np.take_along_axis(block, neighbours, axis=1)
+            keep = scores > min_similarity
+            sources.append(np.repeat(rows + start, k).reshape(-1, k)[keep])
+            targets.append(neighbours[keep])
+            similarities.append(scores[keep])
+        return np.concatenate(sources), np.concatenate(targets), np.concatenate(similarities)
+
+
+def top_k(scores, k):
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top], kind='stable')]
+
+
+_indexes = {}
+
+
+def load_similarity_index(startups_data=None, version=None, method='tfidf'):
+    # Memoized per dataset version (or per frame, see data_version) and method
+    key = (data_version(startups_data, version), method)
+    if key not in _indexes:
+        _indexes.clear()
+        _indexes[key] = SimilarityIndex.build(startups_data if startups_data is not None else load_startups(), method)
+    return _indexes[key]
@@ -0,0 +1,201 @@
+import csv
+import filecmp
+import glob
+import json
+import os
+import shutil
+
+from schema import COLUMNS, event_year, link_event
+
+# Streaming writers for scraped records. Each record is written as soon as it
+# arrives, so memory stays flat regardless of crawl size. Output goes to a
+# temporary file that only replaces the target on close, and only if its
+# content differs, so a crash never leaves a half-written file behind.
+
+
+class Sink:
+    def __init__(self, path):
+        self.path = path
+        self.tmp_path = path + '.tmp'
+        self.count = 0
+        self.replaced = False
+
+    def write(self, record):
+        self._write(dict(zip(COLUMNS, record)))
+        self.count += 1
+
+    def close(self):
+        self._close()
+        if os.path.exists(self.path) and filecmp.cmp(self.tmp_path, self.path, shallow=False):
+            os.remove(self.tmp_path)
+        else:
+            os.replace(self.tmp_path, self.path)
+            self.replaced = True
+        return self.replaced
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._close()
+            self._discard()
+
+    def _discard(self):
+        os.remove(self.tmp_path)
+
+
+class CsvSink(Sink):
+    # Social links are stored as a JSON object rather than a Python repr
+    def __init__(self, path):
+        super().__init__(path)
+        self.file = open(self.tmp_path, 'w', newline='', encoding='utf-8')
+        self.writer = csv.DictWriter(self.file, fieldnames=COLUMNS)
+        self.writer.writeheader()
+
+    def _write(self, row):
+        row['Social Links'] = json.dumps(row['Social Links'], ensure_ascii=False)
+        self.writer.writerow(row)
+
+    def _close(self):
+        self.file.close()
+
+
+class JsonLinesSink(Sink):
+    def __init__(self, path):
+        super().__init__(path)
+        self.file = open(self.tmp_path, 'w', encoding='utf-8')
+
+    def _write(self, row):
+        self.file.write(json.dumps(row, ensure_ascii=False) + '\n')
+
+    def _close(self):
+        self.file.close()
+
+
+class ParquetSink(Sink):
+    # Buffers `batch_size` rows per row group; social links become a map<string, string>
+    def __init__(self, path, batch_size=500):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        super().__init__(path)
+        self.pa = pa
+        self.batch_size = batch_size
+        self.schema = pa.schema([
+            (column, pa.map_(pa.string(), pa.string()) if column == 'Social Links' else pa.string())
+            for column in COLUMNS
+        ])
+        self.writer = pq.ParquetWriter(self.tmp_path, self.schema)
+        self.rows = []
+
+    def _write(self, row):
+        row['Social Links'] = list(row['Social Links'].items())
+        self.rows.append(row)
+        if len(self.rows) >= self.batch_size:
+            self._flush()
+
+    def _flush(self):
+        if self.rows:
+            self.writer.write_table(self.pa.Table.from_pylist(self.rows, schema=self.schema))
+            self.rows = []
+
+    def _close(self):
+        self._flush()
+        self.writer.close()
+
+
+PARTITION_COLUMNS = ['Event', 'Year', 'Country']
+
+
+class PartitionedSink(Sink):
+    # Hive-partitioned Parquet directory (Event=lis24/Year=2024/Country=Portugal/).
+    # Partitions are staged next to the target and each event's edition is swapped
+    # in on close; the ones this crawl did not produce (other events and editions)
+    # are left alone.
+    def __init__(self, path, batch_size=10000):
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        # Fail before the crawl rather than when swapping partitions in at the end
+        if os.path.exists(path) and not os.path.isdir(path):
+            raise NotADirectoryError(f'{path} is not a directory; partitioned output needs one')
+        super().__init__(path)
+        self.pa = pa
+        self.ds = ds
+        self.batch_size = batch_size
+        self.schema = pa.schema([(column, pa.string()) for column in COLUMNS] + [('Event', pa.string()), ('Year', pa.int16())])
+        self.partitioning = ds.partitioning(pa.schema([(column, self.schema.field(column).type) for column in PARTITION_COLUMNS]), flavor='hive')
+        shutil.rmtree(self.tmp_path, ignore_errors=True)
+        self.rows = []
+        self.batches = 0
+
+    def _write(self, row):
+        # Social links as JSON text, like the CSV sink
+        row['Social Links'] = json.dumps(row['Social Links'], ensure_ascii=False)
+        row['Event'] = link_event(row['Link'])
+        row['Year'] = event_year(row['Event'])
+        self.rows.append(row)
+        if len(self.rows) >= self.batch_size:
+            self._flush()
+
+    def _flush(self):
+        if self.rows:
+            self.ds.write_dataset(
+                self.pa.Table.from_pylist(self.rows, schema=self.schema), self.tmp_path,
+                format='parquet', partitioning=self.partitioning,
+                basename_template=f'part-{self.batches}-{{i}}.parquet',
+                existing_data_behavior='overwrite_or_ignore',
+            )
+            self.batches += 1
+            self.rows = []
+
+    def _close(self):
+        self._flush()
+
+    def _discard(self):
+        shutil.rmtree(self.tmp_path, ignore_errors=True)
+
+    def close(self):
+        # Whole Event=/Year= subtrees are swapped, so that countries which lost
+        # their last startup (or all of them, to another country) disappear too
+        self._close()
+        for directory in sorted(glob.glob(os.path.join(self.tmp_path, '*', '*'))):
+            target = os.path.join(self.path, os.path.relpath(directory, self.tmp_path))
+            if self._same_tree(directory, target):
+                continue
+            shutil.rmtree(target, ignore_errors=True)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(directory, target)
+            self.replaced = True
+        self._discard()
+        return self.replaced
+
+    @staticmethod
+    def _same_tree(staged, target):
+        def listing(root):
+            return sorted(os.path.relpath(os.path.join(parent, name), root) for parent, _, files in os.walk(root) for name in files)
+
+        if not os.path.isdir(target) or listing(staged) != listing(target):
+            return False
+        return all(filecmp.cmp(os.path.join(staged, name), os.path.join(target, name), shallow=False) for name in listing(staged))
+
+
+SINKS = {
+    'csv': CsvSink,
+    'jsonl': JsonLinesSink,
+    'parquet': ParquetSink,
+    'partitioned': PartitionedSink,
+}
+
+
+def open_sink(path, format=None):
+    if format is None and os.path.isdir(path):
+        format = 'partitioned'
+    if format is None:
+        format = os.path.splitext(path)[1].lstrip('.').lower() or 'csv'
+    if format not in SINKS:
+        raise ValueError(f"Unsupported output format '{format}', expected one of {', '.join(SINKS)}")
+    return SINKS[format](path)
@@ -1,137 +1,266 @@
-import streamlit as st
+import io
+import os
+import shutil
+import sys
+
 import pandas as pd
-from sklearn.feature_extraction.text import CountVectorizer
-import matplotlib.pyplot as plt
-import seaborn as sns
-from wordcloud import WordCloud
+import streamlit as st
 
-# Load the dataset
-file_path = 'websummit_startups_2024.csv'
-startups_data = pd.read_csv(file_path)
+import instrumentation
+from cube import load_cube
+from dataset import CACHE_ROOT, dataset_version, load_startups, query, scoped_version, store_events
 
-# Streamlit app
-st.title("Web Summit Startups Analysis Dashboard")
+# Every rerun of this script reuses results cached per dataset scope, so widget
+# interactions only pay for what they have not rendered before. Bounded caches
+# evict their least recently used entries; the sidebar button clears them all.
+# Plotting, text and word cloud libraries are imported by the functions that use
+# them, so a cold start only loads what the selected analysis needs.
+FIGURE_CACHE_SIZE = 64
+# Datasets kept in memory; re-scrapes keep producing new versions
+DATA_CACHE_SIZE = 4
+# In-process memos of the analysis modules, and their artifacts under CACHE_ROOT.
+# The scraper's HTTP cache and journal are not the dashboard's to clear.
+MEMOS = {'cube': '_cubes', 'keywords': '_indexes', 'search': '_indexes', 'similarity': '_indexes', 'wordclouds': '_images', 'incremental': '_states'}
+DERIVED_CACHES = ['datasets', 'terms', 'layouts', 'wordclouds', 'incremental']
+# With WEBSUMMIT_INCREMENTAL set, keyword views and counts come from a state that
+# every new dataset version updates by its delta (see incremental.py)
+INCREMENTAL = os.environ.get('WEBSUMMIT_INCREMENTAL', '') not in ('', '0')
 
-# Overview Section
-st.header("Overview")
-total_startups = len(startups_data)
-total_countries = startups_data['Country'].nunique()
-total_categories = startups_data['Category'].nunique()
-st.metric("Total Startups", total_startups)
-st.metric("Total Countries", total_countries)
-st.metric("Total Categories", total_categories)
+@st.cache_data(max_entries=DATA_CACHE_SIZE, show_spinner=False)
+def load_data(scope):
+    # A scope is the dataset version (scoped to the selected events) and those
+    # events; only their partitions are read from the store
+    events = scope[1]
+    return query(event=list(events)) if events else load_startups()
 
-# Analysis Selection
-analysis_type = st.selectbox("Select Analysis Type", ["Overview", "Category Analysis", "Country Analysis", "Pitch Analysis", "Potential Collaborations", "Emerging Categories", "Focus on Web3 Startups", "Comparison"])
+def clear_caches():
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    for name, memo in MEMOS.items():
+        # A module not imported yet has nothing cached
+        if name in sys.modules:
+            getattr(sys.modules[name], memo).clear()
+    for name in DERIVED_CACHES:
+        shutil.rmtree(os.path.join(CACHE_ROOT, name), ignore_errors=True)
+
+def figure_to_png(fig):
+    import matplotlib.pyplot as plt
+
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', bbox_inches='tight')
+    plt.close(fig)
+    return buffer.getvalue()
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def analytics(scope):
+    from incremental import load_analytics, state_key
+
+    return load_analytics(load_data(scope), state_key(event=list(scope[1]) or None))
+
+def term_source(scope):
+    # Anything with top_words(): the incremental state or this scope's term index
+    if INCREMENTAL:
+        return analytics(scope)
+    from keywords import load_term_index
+
+    return load_term_index(load_data(scope), scope[0])
+
+@st.cache_data(max_entries=FIGURE_CACHE_SIZE, show_spinner=False)
+def render_wordcloud(scope, kind, value=None, preview=True):
+    import wordclouds
+
+    startups_data = load_data(scope)
+    term_index = term_source(scope)
+    if kind == 'Web3':
+        freqs = wordclouds.frequencies(term_index, mask=startups_data['Category'].str.contains('Web3', case=False, na=False))
+    else:
+        freqs = wordclouds.frequencies(term_index, **{kind.lower(): value})
+    return wordclouds.render_png(freqs, preview)
+
+@st.cache_data(max_entries=FIGURE_CACHE_SIZE, show_spinner=False)
+def compute_common_words(scope):
+    return term_source(scope).top_words(20)
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def count_cube(scope):
+    if INCREMENTAL:
+        return analytics(scope).cube
+    return load_cube(load_data(scope), scope[0])
+
+@st.cache_data(max_entries=FIGURE_CACHE_SIZE, show_spinner=False)
+def render_category_country_heatmap(scope):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    category_country_pivot = count_cube(scope).pivot('Category', 'Country')
+    fig = plt.figure(figsize=(12, 8))
+    sns.heatmap(category_country_pivot, cmap='viridis', annot=True, fmt='d', cbar_kws={'label': 'Number of Startups'})
+    plt.title('Heatmap of Startups by Category and Country')
+    plt.xlabel('Country')
+    plt.ylabel('Category')
+    return figure_to_png(fig)
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def similarity_index(scope):
+    from similarity import load_similarity_index
+
+    return load_similarity_index(load_data(scope), scope[0])
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def search_index(scope):
+    from search import load_search_index
+
+    return load_search_index(load_data(scope), scope[0])
 
 # Category Analysis
-if analysis_type == "Category Analysis":
+def category_analysis(scope, startups_data, cube, preview):
     st.header("Category Analysis")
-    category_counts = startups_data['Category'].value_counts()
+    category_counts = cube.marginal('Category')
     st.bar_chart(category_counts)
 
     # Word Cloud for Top Categories
     st.subheader("Word Cloud for Top Categories")
-    top_categories = startups_data['Category'].value_counts().head(10).index
+    top_categories = category_counts.head(10).index
     selected_category = st.selectbox("Select a Category", top_categories)
-    category_startups = startups_data[startups_data['Category'] == selected_category]
-    category_pitches = category_startups['Pitch'].dropna()
-    category_wordcloud = WordCloud(width=800, height=400, background_color='white').generate(' '.join(category_pitches))
-    plt.figure(figsize=(10, 6))
-    plt.imshow(category_wordcloud, interpolation='bilinear')
-    plt.axis('off')
-    st.pyplot(plt)
-    plt.close()
+    st.image(render_wordcloud(scope, 'Category', selected_category, preview))
 
 # Country Analysis
-elif analysis_type == "Country Analysis":
+def country_analysis(scope, startups_data, cube, preview):
     st.header("Country Analysis")
     num_countries = st.slider("Select Number of Countries", 1, 20, 10)
-    country_counts = startups_data['Country'].value_counts().head(num_countries)
+    country_counts = cube.marginal('Country').head(num_countries)
     st.bar_chart(country_counts)
 
     # Word Cloud for Top Countries
     st.subheader("Word Cloud for Top Countries")
-    top_countries = startups_data['Country'].value_counts().head(num_countries).index
+    top_countries = country_counts.index
     selected_country = st.selectbox("Select a Country", top_countries)
-    country_startups = startups_data[startups_data['Country'] == selected_country]
-    country_pitches = country_startups['Pitch'].dropna()
-    country_wordcloud = WordCloud(width=800, height=400, background_color='white').generate(' '.join(country_pitches))
-    plt.figure(figsize=(10, 6))
-    plt.imshow(country_wordcloud, interpolation='bilinear')
-    plt.axis('off')
-    st.pyplot(plt)
-    plt.close()
+    st.image(render_wordcloud(scope, 'Country', selected_country, preview))
 
 # Pitch Analysis
-elif analysis_type == "Pitch Analysis":
+def pitch_analysis(scope, startups_data, cube, preview):
     st.header("Pitch Analysis")
-    clean_pitches = startups_data['Pitch'].dropna()
-    vectorizer = CountVectorizer(stop_words='english', max_features=20)
-    word_counts = vectorizer.fit_transform(clean_pitches)
-    common_words = pd.DataFrame({
-        'Word': vectorizer.get_feature_names_out(),
-        'Frequency': word_counts.toarray().sum(axis=0)
-    }).sort_values(by='Frequency', ascending=False)
+    common_words = compute_common_words(scope)
     st.bar_chart(common_words.set_index('Word'))
 
 # Potential Collaborations
-elif analysis_type == "Potential Collaborations":
+def potential_collaborations(scope, startups_data, cube, preview):
     st.header("Potential Collaborations")
-    category_country_pivot = startups_data.pivot_table(index='Category', columns='Country', aggfunc='size', fill_value=0)
-    plt.figure(figsize=(12, 8))
-    sns.heatmap(category_country_pivot, cmap='viridis', annot=True, fmt='d', cbar_kws={'label': 'Number of Startups'})
-    plt.title('Heatmap of Startups by Category and Country')
-    plt.xlabel('Country')
-    plt.ylabel('Category')
-    st.pyplot(plt)
-    plt.close()
+    st.image(render_category_country_heatmap(scope))
+
+    st.subheader("Find Collaborators")
+    selected_startup = st.selectbox("Select a Startup", sorted(startups_data['Startup Name'].unique()))
+    num_matches = st.slider("Number of Matches", 1, 50, 10)
+    st.dataframe(similarity_index(scope).query(selected_startup, k=num_matches), hide_index=True)
 
 # Emerging Categories
-elif analysis_type == "Emerging Categories":
+def emerging_categories(scope, startups_data, cube, preview):
     st.header("Emerging Categories")
-    emerging_categories = startups_data['Category'].value_counts().tail(10)
+    emerging_categories = cube.emerging(10)
     st.bar_chart(emerging_categories)
 
 # Focus on Web3 Startups
-elif analysis_type == "Focus on Web3 Startups":
+def web3_focus(scope, startups_data, cube, preview):
     st.header("Focus on Web3 Startups")
-    web3_startups = startups_data[startups_data['Category'].str.contains('Web3', case=False, na=False)]
-    web3_pitches = web3_startups['Pitch'].dropna()
-    web3_wordcloud = WordCloud(width=800, height=400, background_color='white').generate(' '.join(web3_pitches))
-    plt.figure(figsize=(10, 6))
-    plt.imshow(web3_wordcloud, interpolation='bilinear')
-    plt.axis('off')
-    st.pyplot(plt)
-    plt.close()
+    st.image(render_wordcloud(scope, 'Web3', None, preview))
 
 # Comparison
-elif analysis_type == "Comparison":
+def comparison(scope, startups_data, cube, preview):
     st.header("Comparison")
     comparison_type = st.selectbox("Select Comparison Type", ["Country Comparison", "Category Comparison"])
 
     if comparison_type == "Country Comparison":
-        countries_to_compare = st.multiselect("Select Countries to Compare", startups_data['Country'].unique(), default=["Switzerland", "Portugal"])
+        countries = startups_data['Country'].dropna().unique()
+        # The events selected may not include the default countries
+        default = [country for country in ["Switzerland", "Portugal"] if country in countries]
+        countries_to_compare = st.multiselect("Select Countries to Compare", countries, default=default)
         for country in countries_to_compare:
             st.subheader(f"Word Cloud for {country} Startups")
-            country_startups = startups_data[startups_data['Country'] == country]
-            country_pitches = country_startups['Pitch'].dropna()
-            country_wordcloud = WordCloud(width=800, height=400, background_color='white').generate(' '.join(country_pitches))
-            plt.figure(figsize=(10, 6))
-            plt.imshow(country_wordcloud, interpolation='bilinear')
-            plt.axis('off')
-            st.pyplot(plt)
-            plt.close()
+            st.image(render_wordcloud(scope, 'Country', country, preview))
 
     elif comparison_type == "Category Comparison":
         categories_to_compare = st.multiselect("Select Categories to Compare", startups_data['Category'].unique(), default=[])
         for category in categories_to_compare:
             st.subheader(f"Word Cloud for {category} Startups")
-            category_startups = startups_data[startups_data['Category'] == category]
-            category_pitches = category_startups['Pitch'].dropna()
-            category_wordcloud = WordCloud(width=800, height=400, background_color='white').generate(' '.join(category_pitches))
-            plt.figure(figsize=(10, 6))
-            plt.imshow(category_wordcloud, interpolation='bilinear')
-            plt.axis('off')
-            st.pyplot(plt)
-            plt.close()
\ No newline at end of file
+            st.image(render_wordcloud(scope, 'Category', category, preview))
+
+# Startup Explorer
+def startup_explorer(scope, startups_data, cube, preview):
+    from search import page, page_count
+
+    st.header("Startup Explorer")
+    search_text = st.text_input("Search names and pitches")
+    country_column, category_column, size_column = st.columns(3)
+    country = country_column.selectbox("Country", ["All"] + sorted(cube.marginal('Country').index))
+    category = category_column.selectbox("Category", ["All"] + sorted(cube.marginal('Category').index))
+    page_size = size_column.selectbox("Rows per Page", [10, 25, 50, 100], index=1)
+
+    # Only the rows of the visible page are materialized and sent to the browser
+    rows = search_index(scope).search(search_text, None if country == "All" else country, None if category == "All" else category)
+    pages = page_count(len(rows), page_size)
+    page_number = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1)
+    st.caption(f"{len(rows)} matching startups")
+    visible = startups_data.iloc[page(rows, page_number, page_size)]
+    st.dataframe(
+        visible[['Startup Name', 'Country', 'Category', 'Pitch', 'Website', 'LinkedIn']],
+        hide_index=True,
+        column_config={'Website': st.column_config.LinkColumn(), 'LinkedIn': st.column_config.LinkColumn()},
+    )
+
+# The Overview needs nothing beyond the metrics shown for every analysis
+ANALYSES = {
+    "Overview": None,
+    "Category Analysis": category_analysis,
+    "Country Analysis": country_analysis,
+    "Pitch Analysis": pitch_analysis,
+    "Potential Collaborations": potential_collaborations,
+    "Emerging Categories": emerging_categories,
+    "Focus on Web3 Startups": web3_focus,
+    "Comparison": comparison,
+    "Startup Explorer": startup_explorer,
+}
+
+# Spans and counters of this rerun, shown in the Timings panel at the bottom
+trace = instrumentation.Trace().start()
+
+if st.sidebar.button("Clear cached results"):
+    clear_caches()
+# With several events in the store, analyses can be limited to some of them
+available_events = store_events()
+events = st.sidebar.multiselect("Events", available_events, default=available_events) if len(available_events) > 1 else []
+if set(events) == set(available_events):
+    events = []
+
+# Load the dataset
+scope = (scoped_version(dataset_version(), event=sorted(events) or None), tuple(sorted(events)))
+startups_data = load_data(scope)
+cube = count_cube(scope)
+# Word clouds are drawn at reduced size unless asked otherwise
+preview = not st.sidebar.checkbox("Full-resolution word clouds", value=False)
+
+# Streamlit app
+st.title("Web Summit Startups Analysis Dashboard")
+
+# Overview Section
+st.header("Overview")
+total_startups = len(startups_data)
+total_countries = startups_data['Country'].nunique()
+total_categories = startups_data['Category'].nunique()
+st.metric("Total Startups", total_startups)
+st.metric("Total Countries", total_countries)
+st.metric("Total Categories", total_categories)
+
+# Analysis Selection
+analysis_type = st.selectbox("Select Analysis Type", list(ANALYSES))
+if ANALYSES[analysis_type] is not None:
+    ANALYSES[analysis_type](scope, startups_data, cube, preview)
+
+trace.stop()
+with st.expander("Timings"):
+    st.caption(f"This rerun took {trace.seconds * 1000:.0f} ms; cached results add no spans.")
+    st.dataframe(pd.DataFrame(
+        [(name, count, total * 1000) for name, (count, total) in trace.totals()],
+        columns=['Span', 'Calls', 'Total (ms)'],
+    ), hide_index=True)
+    if trace.counters:
+        st.dataframe(pd.DataFrame(sorted(trace.counters.items()), columns=['Counter', 'Value']), hide_index=True)
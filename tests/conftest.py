@@ -0,0 +1,11 @@
+import os
+import sys
+import tempfile
+
+# The modules live at the top of the repository, and derive their cache paths
+# at import time: point them at a scratch directory before any is imported.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault('WEBSUMMIT_CACHE_DIR', tempfile.mkdtemp(prefix='websummit-tests-'))
+os.environ.setdefault('WEBSUMMIT_STORE', os.path.join(os.environ['WEBSUMMIT_CACHE_DIR'], 'store'))
+os.environ.pop('WEBSUMMIT_DATASET', None)
@@ -0,0 +1,13 @@
+import analyse
+
+
+def test_fingerprint_covers_shared_code(monkeypatch):
+    before = analyse.fingerprint('common_words', 'v1', ('png',))
+    monkeypatch.setattr(analyse, 'MODULES', analyse.MODULES + ['schema'])
+    analyse.code_stamp.cache_clear()
+    try:
+        assert analyse.fingerprint('common_words', 'v1', ('png',)) != before
+    finally:
+        monkeypatch.undo()
+        analyse.code_stamp.cache_clear()
+    assert analyse.fingerprint('common_words', 'v1', ('png',)) == before
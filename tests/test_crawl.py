@@ -0,0 +1,206 @@
+import json
+import os
+from contextlib import nullcontext
+from urllib.parse import urlsplit
+
+import pytest
+import requests
+
+import fixtures
+import scraping
+from crawler import Fetcher
+from httpcache import HttpCache
+from journal import CrawlJournal
+from scheduler import CrawlReport
+
+DATASET = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'websummit_startups_2024.csv')
+
+
+@pytest.fixture(scope='module')
+def rows():
+    return fixtures.load_rows(DATASET)[:150]
+
+
+def crawl(rows, max_pages=2, **faults):
+    server = fixtures.serve(rows, **faults)
+    report = CrawlReport()
+    try:
+        with Fetcher(concurrency=4, rate=0, retries=1, backoff=0.01, adaptive=True) as fetcher:
+            records = list(scraping.crawl(fetcher, server.base_url, max_pages, report=report, retry_delay=0))
+    finally:
+        server.shutdown()
+        server.server_close()
+    return records, report
+
+
+def test_clean_crawl(rows):
+    records, report = crawl(rows)
+    assert report.complete and not report.quarantined
+    assert [record[0] for record in records] == [row['Startup Name'] for row in rows]
+    assert [record[2] for record in records] == [row['Country'] or 'N/A' for row in rows]
+
+
+def test_quarantined_pages_are_recovered(rows):
+    # Every page fails its first two requests: more than the fetcher retries
+    records, report = crawl(rows, failures_per_path=2)
+    assert report.complete
+    assert len(report.quarantined) == 2 + len(rows)
+    assert sorted(report.recovered) == sorted(report.quarantined)
+    # Recovered records are complete, not placeholders
+    assert {urlsplit(record[1]).path: record[2] for record in records} == {row['Path']: row['Country'] or 'N/A' for row in rows}
+
+
+def test_persistent_failures_are_reported(rows):
+    records, report = crawl(rows, max_pages=1, failures_per_path=100)
+    assert not report.complete
+    assert report.failed == [report.quarantined[0]] and report.failed[0].endswith('/page/1/')
+    assert records == []
+
+
+def test_throttled_crawl_is_complete(rows):
+    records, report = crawl(rows, latency=0.01, error_rate=0.05, capacity=3, retry_after=0)
+    assert report.complete
+    assert len(records) == len(rows)
+
+
+def test_failed_requests_release_their_slot():
+    fetcher = Fetcher(concurrency=2, rate=0, retries=1, backoff=0.001)
+
+    def broken(*args, **kwargs):
+        raise requests.exceptions.ChunkedEncodingError('connection broken')
+
+    fetcher.session.get = broken
+    for _ in range(3):
+        with pytest.raises(requests.exceptions.ChunkedEncodingError):
+            fetcher.request('http://127.0.0.1:9/')
+    assert fetcher.control.in_flight == 0
+    fetcher.close()
+
+
+def requests_served(server):
+    return sum(server.attempts.values())
+
+
+@pytest.mark.parametrize('stop', ['raise', 'close'])
+def test_stopping_drops_queued_requests(stop):
+    rows = fixtures.load_rows(DATASET)[:400]
+    server = fixtures.serve(rows, latency=0.01)
+    try:
+        with pytest.raises(KeyboardInterrupt) if stop == 'raise' else nullcontext():
+            with Fetcher(concurrency=2, rate=0, retries=1, backoff=0.01, adaptive=False) as fetcher:
+                records = scraping.crawl(fetcher, server.base_url, 4, retry_delay=0)
+                next(records)
+                if stop == 'raise':
+                    raise KeyboardInterrupt
+                records.close()
+        # The first listing page and the details in flight, not the 100 queued ones
+        assert requests_served(server) < 50
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def detail_requests(server):
+    return sum(count for path, count in server.attempts.items() if '/page/' not in path)
+
+
+def incremental_crawl(server, tmp_path, finish=True):
+    # One scraper run with the HTTP cache and journal under tmp_path
+    journal = CrawlJournal(str(tmp_path / 'journal.jsonl'))
+    journal.begin()
+    parsed = []
+
+    def parse_details(html):
+        parsed.append(html)
+        return scraping.parse_company_details(html)
+
+    with Fetcher(concurrency=4, rate=0, retries=1, backoff=0.01, cache=HttpCache(str(tmp_path / 'http'))) as fetcher:
+        records = list(scraping.crawl(fetcher, server.base_url, 1, journal, parse_details=parse_details, retry_delay=0))
+    if finish:
+        journal.finish()
+    return records, journal, parsed
+
+
+@pytest.fixture
+def server(rows):
+    server = fixtures.serve([dict(row) for row in rows[:30]])
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_rerun_revalidates_and_skips_unchanged_pages(server, tmp_path):
+    first, _, parsed = incremental_crawl(server, tmp_path)
+    assert len(parsed) == 30 and detail_requests(server) == 30
+
+    # Every page is revalidated (answered 304) and none is parsed again
+    again, journal, parsed = incremental_crawl(server, tmp_path)
+    assert again == first and parsed == [] and detail_requests(server) == 60
+    assert journal.run == 2
+
+    # A changed page is parsed again, and only that one
+    server.details[server.rows[3]['Path']]['Pitch'] = 'A brand new pitch'
+    changed, _, parsed = incremental_crawl(server, tmp_path)
+    assert len(parsed) == 1 and changed[3][5] == 'A brand new pitch'
+    assert changed[:3] == first[:3] and changed[4:] == first[4:]
+
+
+def test_interrupted_run_resumes_without_detail_requests(server, tmp_path):
+    first, _, _ = incremental_crawl(server, tmp_path, finish=False)
+    requests_before = detail_requests(server)
+
+    journal = CrawlJournal(str(tmp_path / 'journal.jsonl'))
+    assert journal.resuming and journal.run == 1
+    assert journal.resumable(first[0][1])['record'] == list(first[0])
+    resumed, journal, parsed = incremental_crawl(server, tmp_path)
+    assert resumed == first and parsed == [] and detail_requests(server) == requests_before
+
+    # Finished: the next run fetches again, with the records as its baseline
+    journal = CrawlJournal(str(tmp_path / 'journal.jsonl'))
+    assert not journal.resuming and journal.resumable(first[0][1]) is None
+    assert journal.previous(first[0][1])['record'] == list(first[0])
+
+
+def test_failed_pages_fall_back_to_the_last_known_record(tmp_path):
+    journal = CrawlJournal(str(tmp_path / 'journal.jsonl'))
+    journal.begin()
+    record = ('Acme', 'https://example.com/acme/', 'Portugal', 'SaaS', {'website': 'https://acme.example'}, 'Pitch')
+    journal.record(record[1], 'digest', list(record))
+    journal.finish()
+
+    class Broken:
+        def fetch(self, url):
+            raise requests.exceptions.ConnectionError('down')
+
+    journal = CrawlJournal(str(tmp_path / 'journal.jsonl'))
+    journal.begin()
+    assert scraping.fetch_startup('Acme', record[1], 'SaaS', Broken(), journal) == record
+    assert scraping.fetch_startup('New', 'https://example.com/new/', 'AI', Broken(), journal) == ('New', 'https://example.com/new/', 'N/A', 'AI', {}, 'N/A')
+    with pytest.raises(requests.exceptions.ConnectionError):
+        scraping.fetch_startup('Acme', record[1], 'SaaS', Broken(), journal, fallback=False)
+
+
+def test_journal_compaction_keeps_the_run(tmp_path):
+    path = str(tmp_path / 'journal.jsonl')
+    for run in (1, 2):
+        journal = CrawlJournal(path)
+        journal.begin()
+        journal.record(f'https://example.com/{run}/', 'digest', ['record'])
+        journal.finish()
+
+    # A crash right after the next run compacted the journal, before its 'start'
+    journal = CrawlJournal(path)
+    journal.run += 1
+    journal._compact()
+    with open(path, encoding='utf-8') as f:
+        assert len(f.readlines()) == 2 + 2
+    journal = CrawlJournal(path)
+    assert journal.run == 2 and not journal.resuming
+    journal.begin()
+    assert journal.run == 3 and journal.resumable('https://example.com/2/') is None
+
+    # Journals compacted without markers count as finished
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps({'url': 'https://example.com/2/', 'digest': 'digest', 'run': 2, 'record': ['record']}) + '\n')
+    journal = CrawlJournal(path)
+    assert journal.run == 2 and not journal.resuming and journal.resumable('https://example.com/2/') is None
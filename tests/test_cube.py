@@ -0,0 +1,62 @@
+import pandas as pd
+import pytest
+
+from cube import CountCube
+from dataset import load_startups
+
+
+@pytest.fixture(scope='module')
+def startups():
+    return load_startups()
+
+
+def alphabetical(counts):
+    # value_counts() output with ties in label order, as the cube ranks them
+    frame = counts.rename('count').rename_axis('label').reset_index()
+    frame = frame.assign(label=frame['label'].astype(object)).sort_values(['count', 'label'], ascending=[False, True], kind='stable')
+    return frame.set_index('label')['count']
+
+
+def test_pivot_matches_pivot_table(startups):
+    expected = startups.pivot_table(index='Category', columns='Country', aggfunc='size', fill_value=0, observed=True)
+    actual = CountCube.build(startups).pivot('Category', 'Country')
+    assert list(actual.index) == list(expected.index) and list(actual.columns) == list(expected.columns)
+    assert (actual.to_numpy() == expected.to_numpy()).all()
+
+
+def test_marginal_matches_value_counts(startups):
+    cube = CountCube.build(startups)
+    for dim in ['Category', 'Country']:
+        expected = alphabetical(startups[dim].value_counts())
+        assert list(cube.marginal(dim).items()) == list(expected.items())
+    swiss = startups[startups['Country'] == 'Switzerland']['Category'].value_counts()
+    assert list(cube.marginal('Category', Country='Switzerland').items()) == list(alphabetical(swiss[swiss > 0]).items())
+
+
+def test_top_k_matches_groupby_value_counts(startups):
+    top = CountCube.build(startups).top_k('Category', by='Country', k=3)
+    # The old code ran on the raw CSV's object columns
+    raw = startups[['Country', 'Category']].astype(object)
+    old = raw.groupby('Country')['Category'].apply(lambda x: x.value_counts().head(3))
+    for country, group in startups.groupby('Country', observed=True)['Category']:
+        counts = group.value_counts()
+        expected = alphabetical(counts[counts > 0]).head(3)
+        assert list(top.loc[country].items()) == list(expected.items())
+        # Only the labels picked within a tie can differ from the old output
+        assert top.loc[country].tolist() == old.loc[country].tolist()
+
+
+def test_emerging_matches_value_counts_tail(startups):
+    expected = alphabetical(startups['Category'].value_counts()).tail(10).iloc[::-1]
+    assert list(CountCube.build(startups).emerging(10).items()) == list(expected.items())
+
+
+def test_merged_matches_build(startups):
+    first, rest = startups.iloc[:1200], startups.iloc[1200:]
+    merged = CountCube.build(first).merged(added=rest)
+    rebuilt = CountCube.build(startups)
+    assert merged.labels == rebuilt.labels
+    assert (merged.counts == rebuilt.counts).all()
+
+    removed = rebuilt.merged(removed=rest)
+    pd.testing.assert_frame_equal(removed.pivot(), CountCube.build(first).pivot())
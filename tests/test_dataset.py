@@ -0,0 +1,56 @@
+import ast
+import os
+
+import pandas as pd
+import pytest
+
+from dataset import load_startups
+from schema import COLUMNS, parse_social_links
+from sinks import SINKS
+
+DATASET = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'websummit_startups_2024.csv')
+
+
+@pytest.mark.parametrize('format', ['csv', 'jsonl', 'parquet'])
+def test_sink_outputs_load_like_the_csv(tmp_path, format):
+    expected = load_startups(DATASET)
+    raw = pd.read_csv(DATASET).head(200)
+    raw = raw.astype(object).where(raw.notna(), None)
+    path = str(tmp_path / f'startups.{format}')
+    with SINKS[format](path) as sink:
+        for row in raw[COLUMNS].itertuples(index=False):
+            row = list(row)
+            row[4] = parse_social_links(row[4])
+            sink.write(row)
+
+    loaded = load_startups(path)
+    columns = ['Startup Name', 'Link', 'Country', 'Category', 'Pitch', 'Event', 'LinkedIn', 'Website']
+    pd.testing.assert_frame_equal(
+        loaded[columns].astype(object).where(loaded[columns].notna(), None),
+        expected[columns].head(200).astype(object).where(expected[columns].head(200).notna(), None),
+    )
+
+
+def test_social_links_from_every_format():
+    links = {'linkedin': 'https://www.linkedin.com/company/a', 'website': 'https://a.com'}
+    assert parse_social_links('{"linkedin": "https://www.linkedin.com/company/a", "website": "https://a.com"}') == links
+    assert parse_social_links("{'linkedin': 'https://www.linkedin.com/company/a', 'com': 'https://a.com'}") == links
+    assert parse_social_links(links) == links
+    assert parse_social_links(list(links.items())) == links
+    assert parse_social_links(None) == {} and parse_social_links(float('nan')) == {}
+
+
+def test_every_social_link_is_kept():
+    # Aikido and Finoa list angel.co as well as their own site
+    raw = pd.read_csv(DATASET)
+    aikido = parse_social_links(raw.loc[raw['Startup Name'] == 'aikido security', 'Social Links'].iloc[0])
+    assert aikido['angel.co'] == 'https://angel.co/company/aikido-security'
+    assert aikido['website'] == 'https://www.aikido.dev'
+    assert parse_social_links({'a': 'https://angel.co/finoa', 'b': 'https://finoa.io', 'c': 'https://linkedin.com/company/finoa', 'd': 'https://de.linkedin.com/company/finoa'}) == {
+        'angel.co': 'https://angel.co/finoa', 'website': 'https://finoa.io',
+        'linkedin': 'https://linkedin.com/company/finoa', 'linkedin-2': 'https://de.linkedin.com/company/finoa',
+    }
+    for value in raw['Social Links'].dropna():
+        links = parse_social_links(value)
+        assert sorted(links.values()) == sorted(set(ast.literal_eval(value).values()))
+        assert parse_social_links(links) == links
@@ -0,0 +1,69 @@
+import os
+
+import pandas as pd
+import pytest
+
+import incremental
+from cube import CountCube
+from dataset import load_startups
+from keywords import TermIndex
+
+
+def edited(startups):
+    # The next crawl: a few rows gone, a few pitches and countries changed, a few new
+    startups = startups.iloc[40:].copy()
+    startups.loc[startups.index[:25], 'Pitch'] = 'Rewritten pitch about robots and quantum robots'
+    startups['Country'] = startups['Country'].astype(object)
+    startups.loc[startups.index[25:30], 'Country'] = 'Atlantis'
+    new = startups.iloc[:10].copy()
+    new['Link'] = new['Link'] + 'new/'
+    startups = pd.concat([startups, new], ignore_index=True)
+    # Sorted categories, as load_startups() has them
+    startups['Country'] = startups['Country'].astype('category')
+    return startups
+
+
+def assert_matches(state, startups):
+    index = TermIndex.build(startups)
+    mask = startups['Pitch'].fillna('').str.contains('blockchain', case=False).to_numpy()
+    for filters in [{}, {'country': 'Portugal'}, {'country': 'Atlantis'}, {'category': 'Fintech & financial services'},
+                    {'country': 'Portugal', 'category': 'SaaS'}, {'mask': mask}, {'mask': mask, 'country': 'Portugal'}]:
+        pd.testing.assert_frame_equal(state.top_words(50, **filters), index.top_words(50, **filters), check_dtype=False)
+    cube = CountCube.build(startups)
+    pd.testing.assert_frame_equal(state.cube.pivot(), cube.pivot())
+    for dim in ['Category', 'Country', 'Event']:
+        pd.testing.assert_series_equal(state.cube.marginal(dim), cube.marginal(dim))
+
+
+@pytest.fixture
+def startups():
+    return load_startups()
+
+
+def test_delta_sync_matches_a_rebuild(startups):
+    state = incremental.Analytics()
+    assert state.sync(startups.iloc[:1500]) == 1500
+    assert state.sync(startups) == 500
+    assert_matches(state, startups)
+
+    changed = edited(startups)
+    assert state.sync(changed) == 40 + 30 + 10
+    assert_matches(state, changed)
+    assert state.sync(changed) == 0
+
+
+def test_save_and_load_across_compactions(startups, tmp_path, monkeypatch):
+    monkeypatch.setattr(incremental, 'CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(incremental, 'MAX_CHUNKS', 2)
+    monkeypatch.setattr(incremental, '_states', {})
+    frames = [startups.iloc[:500], startups.iloc[:1000], startups.iloc[:1500], startups, edited(startups)]
+    for frame in frames:
+        # Each sync starts from what the previous one saved
+        incremental._states.clear()
+        state = incremental.load_analytics(frame, key='test')
+        chunks = [name for name in os.listdir(tmp_path / 'test') if name.endswith('.npz') and name.startswith('chunk-')]
+        assert 1 <= len(chunks) <= incremental.MAX_CHUNKS
+        assert_matches(state, frame)
+
+    incremental._states.clear()
+    assert_matches(incremental.load_analytics(frames[-1], key='test'), frames[-1])
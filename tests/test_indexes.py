@@ -0,0 +1,29 @@
+import os
+
+import cube
+import keywords
+import search
+import similarity
+from dataset import data_version, frame_version, load_startups
+
+
+def test_indexes_follow_the_frame_passed_in():
+    startups = load_startups()
+    swiss = startups[startups['Country'] == 'Switzerland']
+
+    assert cube.load_cube(startups).counts.sum() == len(startups)
+    assert cube.load_cube(swiss).counts.sum() == len(swiss)
+    assert keywords.load_term_index(startups).matrix.shape[0] == len(startups)
+    assert keywords.load_term_index(swiss).matrix.shape[0] == len(swiss)
+    assert os.path.isdir(keywords.CACHE_DIR) and any(name.startswith(frame_version(swiss)[:16]) for name in os.listdir(keywords.CACHE_DIR))
+    assert len(similarity.load_similarity_index(swiss).startups) == len(swiss)
+    assert search.load_search_index(swiss).matrix.shape[0] == len(swiss)
+
+
+def test_explicit_version_is_the_key():
+    startups = load_startups()
+    assert data_version(startups, 'v1') == 'v1'
+    assert data_version(startups) == data_version(startups.copy())
+    assert data_version(startups) != data_version(startups.head(10))
+    first = cube.load_cube(startups, 'v1')
+    assert cube.load_cube(startups.head(10), 'v1') is first
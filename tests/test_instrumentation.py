@@ -0,0 +1,100 @@
+import json
+import logging
+import re
+import threading
+
+import pytest
+
+import instrumentation
+
+
+@pytest.fixture
+def metrics():
+    instrumentation.disable()
+    instrumentation.reset()
+    yield instrumentation
+    instrumentation.disable()
+    instrumentation.reset()
+
+
+def test_disabled_metrics_are_a_no_op(metrics):
+    assert metrics.span('a') is metrics.NOOP
+    with metrics.span('a'):
+        metrics.incr('b')
+    assert metrics.snapshot() == {'spans': {}, 'counters': {}}
+
+
+def test_enabled_metrics_aggregate(metrics):
+    metrics.enable()
+    for _ in range(3):
+        with metrics.span('a'):
+            metrics.incr('b', 2)
+    data = metrics.snapshot()
+    assert data['spans']['a']['count'] == 3
+    assert data['spans']['a']['max_seconds'] <= data['spans']['a']['total_seconds']
+    assert data['counters'] == {'b': 6}
+
+
+def test_traces_only_see_their_own_thread(metrics):
+    seen = {}
+
+    def work(name):
+        with metrics.Trace() as trace:
+            with metrics.span(name):
+                metrics.incr(name)
+        seen[name] = trace
+
+    with metrics.Trace() as main:
+        threads = [threading.Thread(target=work, args=(name,)) for name in ('x', 'y')]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        with metrics.span('main'):
+            metrics.incr('main')
+    assert [name for name, _ in main.spans] == ['main'] and main.counters == {'main': 1}
+    for name in ('x', 'y'):
+        assert [span for span, _ in seen[name].spans] == [name] and seen[name].counters == {name: 1}
+    # Traces work while metrics are disabled, and leave the global totals alone
+    assert metrics.snapshot() == {'spans': {}, 'counters': {}}
+    assert metrics.span('after') is metrics.NOOP
+
+
+def test_exporters(metrics, tmp_path, caplog):
+    exporters = metrics.parse_exporters(f"log,json:{tmp_path / 'metrics.json'},prom:{tmp_path / 'metrics.prom'}")
+    metrics.enable(exporters)
+    metrics.record_span('parse.details', 0.5)
+    metrics.record_span('parse.details', 0.25)
+    metrics.record_span('odd "name"\\', 1.0)
+    metrics.incr('http.requests', 3)
+    with caplog.at_level(logging.INFO, logger='websummit.metrics'):
+        data = metrics.export()
+
+    with open(tmp_path / 'metrics.json', encoding='utf-8') as f:
+        assert json.load(f) == data
+    assert data['spans']['parse.details'] == {'count': 2, 'total_seconds': 0.75, 'max_seconds': 0.5}
+    assert 'span parse.details count=2 total=0.750000s max=0.500000s' in caplog.messages
+    assert 'counter http.requests=3' in caplog.messages
+
+    with open(tmp_path / 'metrics.prom', encoding='utf-8') as f:
+        lines = f.read().splitlines()
+    assert 'websummit_span_seconds_total{span="parse.details"} 0.750000' in lines
+    assert 'websummit_span_calls_total{span="parse.details"} 2' in lines
+    assert 'websummit_span_max_seconds{span="parse.details"} 0.500000' in lines
+    assert 'websummit_span_calls_total{span="odd \\"name\\"\\\\"} 1' in lines
+    assert 'websummit_events_total{name="http.requests"} 3' in lines
+    # Every family is declared once, right before its contiguous samples
+    sample = re.compile(r'^(\w+)\{\w+="(?:[^"\\]|\\.)*"\} [0-9.]+$')
+    family, seen = None, []
+    for line in lines:
+        if line.startswith('# TYPE '):
+            family = line.split()[2]
+            assert family not in seen and line.split()[3] in ('counter', 'gauge')
+            seen.append(family)
+        else:
+            assert sample.match(line).group(1) == family
+
+
+def test_unknown_exporter(metrics):
+    with pytest.raises(ValueError):
+        metrics.parse_exporters('statsd')
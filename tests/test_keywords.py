@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import CountVectorizer
+
+from dataset import load_startups
+from keywords import TermIndex
+
+
+def test_group_means_match_the_dense_groupby():
+    # The table relation.py used to build from CountVectorizer(max_features=20)
+    startups = load_startups()
+    vectorizer = CountVectorizer(stop_words='english', max_features=20)
+    clean_pitches = startups['Pitch'].dropna()
+    word_counts = vectorizer.fit_transform(clean_pitches)
+    words_df = pd.DataFrame(word_counts.toarray(), columns=vectorizer.get_feature_names_out())
+    words_df['Category'] = startups.loc[clean_pitches.index, 'Category'].astype(object).to_numpy()
+    expected = words_df.groupby('Category').mean()
+
+    index = TermIndex.build(startups)
+    top_words = sorted(index.top_words(20)['Word'])
+    assert top_words == list(expected.columns)
+    actual = index.group_means('Category', top_words, mask=startups['Pitch'].notna())
+    pd.testing.assert_frame_equal(actual, expected, check_exact=True, check_names=False, check_index_type=False, check_column_type=False)
+
+
+def test_sums_and_counts_match_the_dense_matrix():
+    startups = load_startups()
+    index = TermIndex.build(startups)
+    dense = index.matrix.toarray()
+    np.testing.assert_array_equal(index.term_counts(), dense.sum(axis=0))
+    portugal = (startups['Country'] == 'Portugal').to_numpy()
+    np.testing.assert_array_equal(index.term_counts(country='Portugal'), dense[portugal].sum(axis=0))
@@ -0,0 +1,32 @@
+import itertools
+
+import networkx as nx
+import numpy as np
+
+from network import spectral_positions
+
+
+def test_spectral_positions_spread_out_components():
+    graph = nx.connected_watts_strogatz_graph(150, 4, 0.1, seed=1)
+    for size in [30] * 3 + [6] * 20 + [2] * 5 + [1] * 5:
+        graph = nx.disjoint_union(graph, nx.cycle_graph(size) if size > 2 else nx.path_graph(size))
+    pos = spectral_positions(graph)
+
+    coords = np.array([pos[node] for node in graph])
+    assert np.abs(coords).max() <= 1.0 + 1e-9
+    assert (coords.std(axis=0) > 0.2).all()
+    assert (np.linalg.norm(coords, axis=1) < 0.1).mean() < 0.05
+    # Components do not overlap
+    boxes = []
+    for nodes in nx.connected_components(graph):
+        component = np.array([pos[node] for node in nodes])
+        boxes.append((component.min(axis=0), component.max(axis=0)))
+    for (low, high), (other_low, other_high) in itertools.combinations(boxes, 2):
+        assert (high < other_low).any() or (other_high < low).any()
+
+
+def test_spectral_positions_of_a_connected_graph():
+    graph = nx.grid_2d_graph(15, 15)
+    coords = np.array(list(spectral_positions(graph).values()))
+    assert np.abs(coords).max() == 1.0
+    assert (coords.std(axis=0) > 0.2).all()
@@ -0,0 +1,91 @@
+import os
+
+import pytest
+
+import parsers
+
+TESTS = os.path.dirname(os.path.abspath(__file__))
+PAGES = os.path.join(TESTS, 'pages')
+BACKENDS = parsers.available_backends()
+
+
+def item(inner):
+    return f'<figure class="{parsers.LISTING_ITEM}">{inner}</figure>'
+
+
+def category(text):
+    return f'<span class="{parsers.LISTING_CATEGORY}">{text}</span>'
+
+
+def country(text):
+    return f'<a class="{parsers.COUNTRY_TAG}"><p class="{parsers.COUNTRY_TEXT}">{text}</p></a>'
+
+
+def social(inner):
+    return f'<div class="{parsers.SOCIAL_BUTTONS}">{inner}</div>'
+
+
+def pitch(text):
+    return f'<div class="{parsers.PITCH_BLOCK}">{text}</div>'
+
+
+def page(name):
+    with open(os.path.join(PAGES, name), encoding='utf-8') as f:
+        return f.read()
+
+
+LISTINGS = {
+    'empty': ('', []),
+    'whitespace': ('  \n', []),
+    'comment only': ('<!-- nothing here -->', []),
+    'script and style': (item('<a href="/a/">Na<script>x()</script>me<style>a{}</style></a>' + category('Fin<template>T</template>tech')), [('Name', '/a/', 'Fintech')]),
+    'comments': (item('<a href="/a/">Na<!-- x -->me</a>' + category('<!-- c -->AI')), [('Name', '/a/', 'AI')]),
+    'missing href': (item('<a>Name</a>' + category('AI')) + item('<a href="">Empty</a>' + category('AI')), []),
+    'missing anchor': (item(category('AI')), []),
+    'missing category': (item('<a href="/a/">Name</a>'), [('Name', '/a/', 'N/A')]),
+    'entities': (item('<a href="/a/?x=1&amp;y=2">A &amp; B&nbsp;C</a>' + category('&nbsp;AI&nbsp;')), [('A & B\xa0C', '/a/?x=1&y=2', 'AI')]),
+}
+
+DETAILS = {
+    'empty': ('', ('N/A', {}, 'N/A')),
+    'whitespace': ('  \n', ('N/A', {}, 'N/A')),
+    'comment only': ('<!-- nothing here -->', ('N/A', {}, 'N/A')),
+    'script and style': (pitch('<p>Hello</p><script>var x = 1;</script><style>.a{}</style><template>T</template> world'), ('N/A', {}, 'Helloworld')),
+    'comments': (country('Port<!-- x -->ugal') + pitch('Hi<!-- hidden --> there'), ('Portugal', {}, 'Hithere')),
+    'missing href': (social('<a>Share</a><a href="">Copy</a><a href="https://x.com/acme">X</a>'), ('N/A', {'x': 'https://x.com/acme'}, 'N/A')),
+    'entities': (pitch('A &amp; B&nbsp;C'), ('N/A', {}, 'A & B\xa0C')),
+    'several sites': (social('<a href="https://wellfound.com/company/acme"></a><a href="https://acme.example"></a>'), ('N/A', {'wellfound.com': 'https://wellfound.com/company/acme', 'website': 'https://acme.example'}, 'N/A')),
+}
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+@pytest.mark.parametrize('case', sorted(LISTINGS))
+def test_listing_edge_cases(backend, case):
+    html, expected = LISTINGS[case]
+    assert parsers.parse_listing(html, backend) == expected
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+@pytest.mark.parametrize('case', sorted(DETAILS))
+def test_details_edge_cases(backend, case):
+    html, expected = DETAILS[case]
+    assert parsers.parse_details(html, backend) == expected
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_saved_pages(backend):
+    assert parsers.parse_listing(page('listing.html'), backend) == [
+        ('AcmeRobotics', '/wp/en-gb/startups/lis24/acme-robotics/', 'Manufacturing & Robotics'),
+        ('Café\xa0Labs', '/wp/en-gb/startups/lis24/caf%C3%A9-labs/', 'Food & Beverage'),
+        ('NoCat', '/wp/en-gb/startups/lis24/nocat/', 'N/A'),
+    ]
+    assert parsers.parse_details(page('detail.html'), backend) == (
+        'Portugal',
+        {'linkedin': 'https://www.linkedin.com/company/acme-robotics', 'x': 'https://twitter.com/acmerobotics', 'website': 'https://acme-robotics.example'},
+        'Acme buildsautonomousarms for small factories.Deployed in 40\xa0plants & counting.',
+    )
+
+
+def test_backends_agree_on_fixture_pages():
+    listings, details = parsers.fixture_pages(os.path.join(os.path.dirname(TESTS), 'websummit_startups_2024.csv'))
+    parsers.check_equivalence(listings, details, BACKENDS)
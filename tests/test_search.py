@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from dataset import load_startups
+from search import PAGE_SIZE, SearchIndex, page, page_count
+
+
+@pytest.fixture(scope='module')
+def startups():
+    return load_startups()
+
+
+@pytest.fixture(scope='module')
+def index(startups):
+    return SearchIndex.build(startups)
+
+
+def names(startups, rows):
+    return set(startups['Startup Name'].iloc[rows])
+
+
+def test_complete_stop_words_are_dropped(index):
+    assert index.query_terms('AI for health') == [('ai', False), ('health', True)]
+    assert index.query_terms('food and beverage') == [('food', False), ('beverage', True)]
+    assert index.query_terms('platform for the') == [('platform', False)]
+    np.testing.assert_array_equal(index.search('AI for health'), index.search('ai health'))
+    np.testing.assert_array_equal(index.search('platform for the'), index.search('platform '))
+    assert len(index.search('AI for health')) > 0
+
+
+def test_only_the_last_fragment_is_a_prefix(startups, index):
+    text = (startups['Startup Name'].fillna('') + ' ' + startups['Pitch'].fillna('')).str.lower()
+    assert names(startups, index.search('fin')) >= names(startups, np.flatnonzero(text.str.contains(r'\bfintech\b')))
+    # A completed word no longer matches longer terms
+    assert len(index.search('robot ')) < len(index.search('robot'))
+
+
+def test_single_characters_are_dropped(startups, index):
+    assert '4.events' in names(startups, index.search('4.events'))
+
+
+def test_filters(startups, index):
+    portugal = np.flatnonzero(startups['Country'] == 'Portugal')
+    np.testing.assert_array_equal(index.search('', country='Portugal'), portugal)
+    saas = index.search('ai', country='Portugal', category='SaaS')
+    assert len(saas) and set(startups['Category'].iloc[saas]) == {'SaaS'} and set(startups['Country'].iloc[saas]) == {'Portugal'}
+    assert len(index.search('', country='Atlantis')) == 0
+    assert len(index.search('')) == len(startups)
+
+
+def test_pagination(index):
+    rows = index.search('ai')
+    assert page_count(0) == 1 and page_count(PAGE_SIZE) == 1 and page_count(PAGE_SIZE + 1) == 2
+    pages = [page(rows, number) for number in range(1, page_count(len(rows)) + 1)]
+    assert all(len(chunk) == PAGE_SIZE for chunk in pages[:-1]) and 0 < len(pages[-1]) <= PAGE_SIZE
+    np.testing.assert_array_equal(np.concatenate(pages), rows)
+    assert len(page(rows, len(pages) + 1)) == 0
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from dataset import load_startups
+from similarity import SimilarityIndex
+
+
+@pytest.fixture(scope='module')
+def index():
+    return SimilarityIndex.build(load_startups())
+
+
+def test_query_excludes_the_startup_and_ranks_by_similarity(index):
+    result = index.query('1Fit', k=10)
+    assert len(result) == 10 and '1Fit' not in set(result['Startup Name'])
+    similarities = result['Similarity'].to_numpy()
+    assert (np.diff(similarities) <= 0).all() and (similarities > 0).all()
+    # Nothing left out scores higher than the last result
+    scores = index.scores(index.matrix[index.position('1Fit')])
+    scores[index.position('1Fit')] = 0
+    assert np.sort(scores)[-10] == pytest.approx(similarities[-1])
+    assert len(index.query(text='software platform for restaurants', k=5)) == 5
+
+
+def test_top_k_pairs_match_a_dense_top_k():
+    index = SimilarityIndex.build(load_startups().iloc[:300])
+    sources, targets, similarities = index.top_k_pairs(k=4, min_similarity=0.05, block_size=64)
+
+    assert (sources != targets).all()
+    dense = (index.matrix @ index.matrix.T).toarray()
+    np.fill_diagonal(dense, 0)
+    expected = {}
+    for row in range(len(dense)):
+        top = np.argsort(-dense[row], kind='stable')[:4]
+        expected[row] = sorted(score for score in dense[row, top] if score > 0.05)
+    actual = {row: [] for row in range(len(dense))}
+    for source, target, score in zip(sources, targets, similarities):
+        assert score == pytest.approx(dense[source, target])
+        actual[source].append(score)
+    for row in actual:
+        np.testing.assert_allclose(sorted(actual[row]), expected[row], rtol=1e-6)
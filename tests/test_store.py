@@ -0,0 +1,42 @@
+import os
+
+import pandas as pd
+import pytest
+
+from dataset import query, write_store
+from sinks import PartitionedSink
+
+DATASET = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'websummit_startups_2024.csv')
+
+
+def test_rewrite_is_unchanged_and_moves_replace_partitions(tmp_path):
+    store = str(tmp_path / 'store')
+    assert write_store(DATASET, store).replaced
+    assert not write_store(DATASET, store).replaced
+
+    # A re-scrape that moved the only Gibraltar startup to Portugal
+    raw = pd.read_csv(DATASET)
+    raw.loc[raw['Country'] == 'Gibraltar', 'Country'] = 'Portugal'
+    moved = tmp_path / 'moved.csv'
+    raw.to_csv(moved, index=False)
+    assert write_store(str(moved), store).replaced
+
+    startups = query(directory=store)
+    assert len(startups) == len(raw)
+    assert not startups['Link'].duplicated().any()
+    assert 'Gibraltar' not in set(startups['Country'].dropna())
+
+
+def test_filters_match_pandas(tmp_path):
+    store = str(tmp_path / 'store')
+    write_store(DATASET, store)
+    raw = pd.read_csv(DATASET)
+    startups = query(country=['Portugal', 'Spain'], columns=['Link', 'Country'], directory=store)
+    assert sorted(startups['Link']) == sorted(raw.loc[raw['Country'].isin(['Portugal', 'Spain']), 'Link'])
+
+
+def test_partitioned_sink_rejects_a_file(tmp_path):
+    path = tmp_path / 'startups.csv'
+    path.write_text('')
+    with pytest.raises(NotADirectoryError):
+        PartitionedSink(str(path))
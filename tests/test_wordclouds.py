@@ -0,0 +1,23 @@
+import os
+
+import wordclouds
+
+
+def test_disk_cache_keeps_the_most_recently_used(tmp_path, monkeypatch):
+    monkeypatch.setattr(wordclouds, 'CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(wordclouds, 'DISK_CACHE_SIZE', 2)
+    monkeypatch.setattr(wordclouds, '_images', wordclouds.OrderedDict())
+    monkeypatch.setattr(wordclouds, 'draw', lambda freqs, width, height: wordclouds.Image.new('RGB', (width, height), 'white'))
+
+    clouds = [{'alpha': 1}, {'beta': 2}, {'gamma': 3}]
+    paths = [os.path.join(str(tmp_path), wordclouds.cache_key(freqs, wordclouds.WIDTH, wordclouds.HEIGHT) + '.png') for freqs in clouds]
+    wordclouds.render(clouds[0])
+    wordclouds.render(clouds[1])
+    os.utime(paths[0], (1, 1))
+    os.utime(paths[1], (2, 2))
+    # A disk hit refreshes the first image, so the second is the oldest
+    wordclouds._images.clear()
+    wordclouds.render(clouds[0])
+    wordclouds.render(clouds[2])
+
+    assert [os.path.exists(path) for path in paths] == [True, False, True]
@@ -0,0 +1,114 @@
+import hashlib
+import io
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from PIL import Image
+
+from dataset import CACHE_ROOT
+from instrumentation import incr, span
+
+# Word clouds drawn from the term index's precomputed counts rather than from
+# re-tokenized joined pitches, so every cloud uses the same tokenizer and stop
+# words as the keyword tables. Rendered images are cached in memory and on disk
+# (both LRU), keyed by the frequencies and the image size.
+
+CACHE_DIR = os.path.join(CACHE_ROOT, 'wordclouds')
+MAX_WORDS = 200
+WIDTH, HEIGHT = 800, 400
+# Interactive previews are drawn at this fraction of the full size
+PREVIEW_SCALE = 0.5
+MEMORY_CACHE_SIZE = 128
+# Images kept on disk; the least recently used beyond this are removed
+DISK_CACHE_SIZE = 2000
+
+_images = OrderedDict()
+_lock = threading.Lock()
+
+
+def frequencies(term_index, country=None, category=None, mask=None, max_words=MAX_WORDS):
+    # Either a keywords.TermIndex or the hashed incremental.Analytics
+    top = term_index.top_words(max_words, country, category, mask)
+    return dict(zip(top['Word'].tolist(), top['Frequency'].tolist()))
+
+
+def cache_key(freqs, width, height):
+    payload = json.dumps([width, height, sorted(freqs.items())])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def draw(freqs, width, height):
+    if not freqs:
+        return Image.new('RGB', (width, height), 'white')
+    # Imported here: images served from the caches never need it
+    from wordcloud import WordCloud
+
+    with span('wordcloud.draw'):
+        return WordCloud(width=width, height=height, background_color='white', max_words=MAX_WORDS).generate_from_frequencies(freqs).to_image()
+
+
+def render(freqs, preview=False):
+    # Returns a PIL image; an empty subset yields a blank canvas
+    scale = PREVIEW_SCALE if preview else 1.0
+    width, height = int(WIDTH * scale), int(HEIGHT * scale)
+    key = cache_key(freqs, width, height)
+    with _lock:
+        if key in _images:
+            _images.move_to_end(key)
+            incr('wordcloud.memory_hits')
+            return _images[key]
+
+    path = os.path.join(CACHE_DIR, key + '.png')
+    if os.path.exists(path):
+        incr('wordcloud.disk_hits')
+        image = Image.open(path)
+        image.load()
+        touch(path)
+    else:
+        image = draw(freqs, width, height)
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        image.save(tmp_path, format='png')
+        os.replace(tmp_path, path)
+        prune_disk_cache()
+
+    with _lock:
+        _images[key] = image
+        if len(_images) > MEMORY_CACHE_SIZE:
+            _images.popitem(last=False)
+    return image
+
+
+def touch(path):
+    # The modification time doubles as the last use
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def prune_disk_cache(limit=None):
+    limit = DISK_CACHE_SIZE if limit is None else limit
+    entries = []
+    for name in os.listdir(CACHE_DIR):
+        if name.endswith('.png'):
+            path = os.path.join(CACHE_DIR, name)
+            try:
+                entries.append((os.path.getmtime(path), path))
+            except OSError:
+                continue
+    entries.sort()
+    for _, path in entries[:max(len(entries) - limit, 0)]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        incr('wordcloud.evictions')
+
+
+def render_png(freqs, preview=False):
+    buffer = io.BytesIO()
+    render(freqs, preview).save(buffer, format='png')
+    return buffer.getvalue()